@@ -0,0 +1,120 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _key(token_key):
+    """Cache key of a token, the token itself is not stored in keys."""
+    return 'auth-token:' + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def _fields(instance, exclude=()):
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in exclude
+    }
+
+
+def _dump(token):
+    """Fields of a token and its user, without the password hash."""
+    return _fields(token), _fields(token.user, exclude={'password'})
+
+
+def _load(data):
+    """
+    New token and user instances from cached fields, the
+    password is deferred and read from the database if needed.
+    """
+    token_fields, user_fields = data
+    token = Token.from_db(
+        None, list(token_fields), list(token_fields.values())
+    )
+    token.user = get_user_model().from_db(
+        None, list(user_fields), list(user_fields.values())
+    )
+    return token
+
+
+class TokenCache:
+    """
+    Tokens with their users: a bounded per-process LRU with
+    a short TTL in front of Django's cache. Entries keep only
+    field values, every request gets its own user instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _remember(self, key, data):
+        expires = monotonic() + settings.AUTH_TOKEN_LOCAL_TTL
+        with self._lock:
+            self._entries[key] = (expires, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_TOKEN_LOCAL_SIZE:
+                self._entries.popitem(last=False)
+
+    def get(self, token_key):
+        key = _key(token_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > monotonic():
+                self._entries.move_to_end(key)
+                data = entry[1]
+            else:
+                self._entries.pop(key, None)
+                data = None
+        if data is None:
+            data = cache.get(key)
+            if data is None:
+                return None
+            self._remember(key, data)
+        return _load(data)
+
+    def set(self, token):
+        key = _key(token.key)
+        data = _dump(token)
+        cache.set(key, data, timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        self._remember(key, data)
+
+    def invalidate(self, token_keys):
+        keys = [_key(token_key) for token_key in token_keys]
+        cache.delete_many(keys)
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that takes tokens with their users from
+    token_cache, only unknown tokens are looked up in the database.
+    Entries are dropped by signals on logout, password change and
+    any other change of the user.
+    """
+
+    def authenticate_credentials(self, key):
+        if not settings.AUTH_TOKEN_CACHE:
+            return super().authenticate_credentials(key)
+        token = token_cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(token)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return token.user, token
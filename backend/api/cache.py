@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+
+from api.conditional import data_version
+from api.images import srcset
+from api.serializers import RecipeReadSerializer
+from recipes.constants import RECIPE_THUMBNAIL_SIZES, RECIPES_VERSION
+from recipes.models import RecipeIngredient
+
+
+def _key(pk, version):
+    return f'recipes:{version}:{pk}'
+
+
+def _overlay(data, recipe, request):
+    """Puts per-user fields over a cached representation."""
+    return {
+        **data,
+        'author': {
+            **data['author'],
+            'is_subscribed': recipe.author_is_subscribed,
+        },
+        'favorites_count': recipe.favorites_count,
+        'is_favorited': recipe.is_favorited,
+        'is_in_shopping_cart': recipe.is_in_shopping_cart,
+        'image': data['image'] and request.build_absolute_uri(data['image']),
+        'image_thumbnail': data['image_thumbnail'] and (
+            request.build_absolute_uri(data['image_thumbnail'])
+        ),
+        'image_srcset': data['image_srcset'] and srcset(
+            recipe.image, RECIPE_THUMBNAIL_SIZES, request
+        ),
+    }
+
+
+def serialize_recipes(recipes, request):
+    """
+    Returns RecipeReadSerializer output for recipes fetched
+    with RecipeQuerySet.for_cached_read. The user-independent
+    part is taken from the cache, only missing recipes get
+    their relations prefetched and serialized. Keys hold the
+    recipes version from the database, so a change made in any
+    process is seen by all of them even with a per-process cache.
+    """
+    version = data_version(request, RECIPES_VERSION)
+    keys = {recipe.pk: _key(recipe.pk, version) for recipe in recipes}
+    cached = cache.get_many(keys.values())
+    missing = [recipe for recipe in recipes if keys[recipe.pk] not in cached]
+    if missing:
+        prefetch_related_objects(
+            missing,
+            'author',
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+        fresh = {
+            keys[recipe.pk]: RecipeReadSerializer(recipe).data
+            for recipe in missing
+        }
+        cache.set_many(fresh, timeout=settings.RECIPE_CACHE_TIMEOUT)
+        cached.update(fresh)
+    return [
+        _overlay(cached[keys[recipe.pk]], recipe, request)
+        for recipe in recipes
+    ]
@@ -0,0 +1,64 @@
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from recipes.constants import USER_VERSION
+from recipes.models import DataVersion
+from recipes.search import ingredient_index
+
+
+def _data_versions(request, names, per_user):
+    """Reads versions once per request for both validators."""
+    if not hasattr(request, '_data_versions'):
+        if per_user and request.user.is_authenticated:
+            names = (*names, USER_VERSION.format(request.user.pk))
+        request._data_versions = list(
+            DataVersion.objects.filter(name__in=names).order_by('name')
+        )
+    return request._data_versions
+
+
+def data_version(request, name):
+    """Version of one name, read with the request versions if any."""
+    for version in getattr(request, '_data_versions', ()):
+        if version.name == name:
+            return version.version
+    return DataVersion.objects.filter(name=name).values_list(
+        'version', flat=True
+    ).first() or 0
+
+
+def versions_condition(*names, per_user=False):
+    """
+    Adds ETag and Last-Modified computed from data versions
+    to a viewset method, answers 304 Not Modified before
+    the queryset is evaluated. With per_user versions of
+    the requesting user are taken into account as well.
+    """
+
+    def etag(request, *args, **kwargs):
+        versions = _data_versions(request, names, per_user)
+        key = ','.join(
+            f'{version.name}={version.version}' for version in versions
+        )
+        if per_user:
+            key = f'{request.user.pk}:{key}'
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        versions = _data_versions(request, names, per_user)
+        return max(
+            (version.modified for version in versions), default=None
+        )
+
+    return method_decorator(
+        condition(etag_func=etag, last_modified_func=last_modified)
+    )
+
+
+ingredients_condition = method_decorator(
+    condition(etag_func=lambda request, *args, **kwargs: (
+        ingredient_index.digest()
+    ))
+)
@@ -1,15 +1,67 @@
 import base64
 
 from django.core.files.base import ContentFile
+from PIL import Image
 from rest_framework import serializers
 
+from api.images import check_image, srcset, thumbnail_url
+from users.constants import IMAGE_READY
+
 
 class Base64ImageField(serializers.ImageField):
-    """Image field for base64 encoded image."""
+    """
+    Image field for base64 encoded image. Only the image header
+    is checked here, decoding and re-encoding are done later
+    by a task queued when the model is saved.
+    """
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            try:
+                format, imgstr = data.split(';base64,')
+                decoded = base64.b64decode(imgstr)
+            except ValueError:
+                self.fail('invalid_image')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        return super().to_internal_value(data)
+            data = ContentFile(decoded, name='temp.' + ext)
+        file = serializers.FileField.to_internal_value(self, data)
+        try:
+            check_image(file)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            self.fail('invalid_image')
+        return file
+
+
+def _is_ready(field_file):
+    return getattr(
+        field_file.instance, f'{field_file.field.name}_status', IMAGE_READY
+    ) == IMAGE_READY
+
+
+class ThumbnailField(serializers.ReadOnlyField):
+    """
+    URL of the thumbnail of an image fitting the given size,
+    None till thumbnails of a new image are written.
+    """
+
+    def __init__(self, size, **kwargs):
+        self.size = size
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or not _is_ready(value):
+            return None
+        return thumbnail_url(value, self.size, self.context.get('request'))
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """srcset attribute value listing thumbnails of an image."""
+
+    def __init__(self, sizes, **kwargs):
+        self.sizes = sizes
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or not _is_ready(value):
+            return None
+        return srcset(value, self.sizes, self.context.get('request'))
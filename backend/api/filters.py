@@ -1,47 +1,127 @@
-from django.db.models import Case, IntegerField, Q, Value, When
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+    TrigramWordSimilarity
+)
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.functions import Greatest
 from django_filters import rest_framework as filters
+from django_filters.fields import MultipleChoiceField
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.constants import RECIPE_ORDERINGS, SEARCH_CONFIG
+from recipes.models import Recipe, RecipeIngredient
+from recipes.search import tag_index
+
+
+def tag_choices():
+    """Slugs of existing tags, read from the in-memory tag index."""
+    return tag_index.choices()
+
+
+class TagSlugsField(MultipleChoiceField):
+    """Checks slugs against the tag index, rebuilt on a miss."""
+
+    def valid_value(self, value):
+        return tag_index.exists(value)
+
+
+class TagSlugsFilter(filters.MultipleChoiceFilter):
+    field_class = TagSlugsField
 
 
 class RecipeFilter(filters.FilterSet):
-    """Search filter for recipes."""
+    """
+    Search filter for recipes, search by name is fuzzy
+    and ranked by trigram similarity, full-text search
+    goes over name, text and ingredients and is ranked
+    by relevance on PostgreSQL. Explicit ordering goes
+    over indexed columns and overrides ranking.
+    """
 
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all()
+    tags = TagSlugsFilter(
+        choices=tag_choices,
+        method='filter_tags'
+    )
+    tags_match = filters.ChoiceFilter(
+        choices=(('any', 'любой из тегов'), ('all', 'все теги')),
+        method='filter_tags_match'
     )
     is_favorited = filters.BooleanFilter(field_name='is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         field_name='is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    q = filters.CharFilter(method='filter_full_text')
+    ordering = filters.ChoiceFilter(
+        choices=(
+            ('popular', 'популярные'),
+            ('trending', 'в трендах'),
+            ('new', 'новые'),
+        ),
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ['author', 'tags']
 
+    def filter_tags(self, queryset, name, value):
+        """
+        Keeps recipes with any (or all, see tags_match) of tags
+        with EXISTS subqueries, so recipes are never repeated.
+        Slugs are resolved to ids by the in-memory tag index.
+        """
+        tag_ids = tag_index.ids(value)
+        through = Recipe.tags.through.objects
+        if self.form.cleaned_data.get('tags_match') == 'all':
+            for tag_id in tag_ids:
+                queryset = queryset.filter(Exists(through.filter(
+                    recipe_id=OuterRef('pk'), tag_id=tag_id
+                )))
+            return queryset
+        return queryset.filter(Exists(through.filter(
+            recipe_id=OuterRef('pk'), tag_id__in=tag_ids
+        )))
 
-class IngredientFilter(filters.FilterSet):
-    """
-    Filter for aligning ingredients in order:
-    first that start with searched phrase, then
-    that contain it and then alphabetically.
-    """
-
-    name = filters.CharFilter(method='filter_name')
+    def filter_tags_match(self, queryset, name, value):
+        """Only changes how filter_tags works."""
+        return queryset
 
-    class Meta:
-        model = Ingredient
-        fields = ['name']
-
-    def filter_name(self, queryset, name, value):
+    def filter_search(self, queryset, name, value):
+        if connection.vendor != 'postgresql':
+            return queryset.filter(name__icontains=value)
         return queryset.filter(
-            Q(name__istartswith=value) | Q(name__icontains=value)
+            Q(name__trigram_similar=value)
+            | Q(name__trigram_word_similar=value)
+            | Q(name__icontains=value)
         ).annotate(
-            search_priority=Case(
-                When(name__istartswith=value, then=Value(1)),
-                default=Value(2),
-                output_field=IntegerField(),
+            similarity=Greatest(
+                TrigramSimilarity('name', value),
+                TrigramWordSimilarity(value, 'name'),
             )
-        ).order_by('search_priority', 'name')
+        ).order_by('-similarity', *Recipe._meta.ordering)
+
+    def filter_full_text(self, queryset, name, value):
+        if connection.vendor != 'postgresql':
+            for word in value.split():
+                queryset = queryset.filter(
+                    Q(name__icontains=word)
+                    | Q(text__icontains=word)
+                    | Exists(RecipeIngredient.objects.filter(
+                        recipe=OuterRef('pk'),
+                        ingredient__name__icontains=word
+                    ))
+                )
+            return queryset
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', *Recipe._meta.ordering)
+
+    def filter_ordering(self, queryset, name, value):
+        """Orders by precomputed scores, see update_recipe_scores."""
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
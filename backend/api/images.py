@@ -0,0 +1,110 @@
+import posixpath
+from io import BytesIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def _extension():
+    return EXTENSIONS[settings.IMAGE_FORMAT]
+
+
+def _encode(image):
+    """Encodes an image in IMAGE_FORMAT, no metadata is written."""
+    has_alpha = (
+        image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    )
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    if has_alpha and settings.IMAGE_FORMAT == 'JPEG':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = BytesIO()
+    image.save(
+        buffer, format=settings.IMAGE_FORMAT, quality=settings.IMAGE_QUALITY
+    )
+    return buffer.getvalue()
+
+
+def _open(file, size):
+    """Opens an image upright and decoded no larger than needed."""
+    image = Image.open(file)
+    image.draft('RGB', (size, size))
+    return ImageOps.exif_transpose(image)
+
+
+def check_image(file):
+    """
+    Cheap check of an upload: only the header is parsed, which
+    also rejects decompression bombs by their declared size.
+    Decoding is left to process_image.
+    """
+    file.seek(0)
+    with Image.open(file):
+        pass
+    file.seek(0)
+
+
+def process_image(file):
+    """
+    Re-encodes an uploaded image: applies EXIF orientation,
+    fits it into IMAGE_MAX_SIZE and drops its metadata.
+    """
+    file.seek(0)
+    image = _open(file, settings.IMAGE_MAX_SIZE)
+    image.thumbnail((settings.IMAGE_MAX_SIZE, settings.IMAGE_MAX_SIZE))
+    return ContentFile(_encode(image), name=f'{uuid4().hex}.{_extension()}')
+
+
+def thumbnail_name(name, size):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(
+        directory, 'thumbnails', f'{stem}_{size}.{_extension()}'
+    )
+
+
+def make_thumbnails(field_file, sizes, overwrite=False):
+    """
+    Writes thumbnails fitting into squares of the given sizes
+    next to a stored image, returns the number of written ones.
+    """
+    storage = field_file.storage
+    names = {size: thumbnail_name(field_file.name, size) for size in sizes}
+    if not overwrite:
+        names = {
+            size: name for size, name in names.items()
+            if not storage.exists(name)
+        }
+    if not names:
+        return 0
+    with storage.open(field_file.name, 'rb') as file:
+        image = _open(file, max(names))
+        for size, name in names.items():
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            storage.delete(name)
+            storage.save(name, ContentFile(_encode(thumbnail)))
+    return len(names)
+
+
+def delete_thumbnails(field_file, sizes):
+    for size in sizes:
+        field_file.storage.delete(thumbnail_name(field_file.name, size))
+
+
+def thumbnail_url(field_file, size, request=None):
+    url = field_file.storage.url(thumbnail_name(field_file.name, size))
+    return request.build_absolute_uri(url) if request else url
+
+
+def srcset(field_file, sizes, request=None):
+    """Value of the srcset attribute listing thumbnails of an image."""
+    return ', '.join(
+        f'{thumbnail_url(field_file, size, request)} {size}w'
+        for size in sizes
+    )
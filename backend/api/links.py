@@ -0,0 +1,185 @@
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.db.models import ForeignKey
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+
+
+def _prepare(model, values):
+    """Converts lookup values, malformed ones mean a missing object."""
+    try:
+        return {
+            key: model._meta.get_field(key).to_python(value)
+            for key, value in values.items()
+        }
+    except ValidationError:
+        raise Http404
+
+
+def insert_link(model, **values):
+    """
+    Creates a link row (favorite, cart item, subscription) with
+    a single INSERT ... SELECT ... WHERE EXISTS ... ON CONFLICT
+    DO NOTHING RETURNING statement. Foreign keys are deferred
+    till commit, so referenced rows are checked by the statement
+    itself. Returns the created instance or None when the row
+    already exists or a referenced row is missing.
+    Sends post_save like Model.save does.
+    """
+    values = _prepare(model, values)
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    instance = model(**values)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    conditions, condition_params = [], []
+    for field in fields:
+        if isinstance(field, ForeignKey):
+            target = field.target_field
+            conditions.append(
+                f'EXISTS (SELECT 1 FROM {quote(target.model._meta.db_table)} '
+                f'WHERE {quote(target.column)} = %s)'
+            )
+            condition_params.append(getattr(instance, field.attname))
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+        f'SELECT {placeholders} WHERE {" AND ".join(conditions)} '
+        f'ON CONFLICT DO NOTHING '
+        f'RETURNING {quote(model._meta.pk.column)}'
+    )
+    params = [
+        field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for field in fields
+    ]
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + condition_params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        instance.pk = row[0]
+        instance._state.adding = False
+        instance._state.db = using
+        post_save.send(
+            sender=model, instance=instance, created=True,
+            update_fields=None, raw=False, using=using
+        )
+    return instance
+
+
+def delete_link(model, **values):
+    """
+    Deletes link rows with a single keyed DELETE ... RETURNING.
+    Returns the number of deleted rows, sends post_delete for each.
+    """
+    values = _prepare(model, values)
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    where = ' AND '.join(
+        f'{quote(model._meta.get_field(key).column)} = %s' for key in values
+    )
+    sql = (
+        f'DELETE FROM {quote(model._meta.db_table)} WHERE {where} '
+        f'RETURNING {quote(model._meta.pk.column)}'
+    )
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, list(values.values()))
+            rows = cursor.fetchall()
+        for (pk,) in rows:
+            instance = model(pk=pk, **values)
+            instance._state.adding = False
+            instance._state.db = using
+            post_delete.send(
+                sender=model, instance=instance, using=using,
+                origin=instance
+            )
+    return len(rows)
+
+
+def _in(quote, column, values):
+    return f'{quote(column)} IN ({", ".join(["%s"] * len(values))})'
+
+
+def insert_links(model, field_name, ids, **values):
+    """
+    Creates link rows to many objects at once, one for every id
+    of the field_name foreign key, with a single INSERT ... SELECT
+    ... ON CONFLICT DO NOTHING RETURNING statement. Ids of missing
+    objects and of existing links are skipped. Returns the set of
+    ids that got new rows. No signals are sent: callers move
+    counters and versions for the whole set themselves.
+    """
+    ids = list(ids)
+    if not ids:
+        return set()
+    values = _prepare(model, values)
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    instance = model(**values)
+    target = model._meta.get_field(field_name).target_field
+    columns, select, params = [], [], []
+    conditions, condition_params = [], []
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        columns.append(quote(field.column))
+        if field.name == field_name:
+            select.append(quote(target.column))
+            continue
+        select.append('%s')
+        params.append(
+            field.get_db_prep_save(field.pre_save(instance, True), connection)
+        )
+        if isinstance(field, ForeignKey):
+            conditions.append(
+                f'EXISTS (SELECT 1 FROM '
+                f'{quote(field.target_field.model._meta.db_table)} '
+                f'WHERE {quote(field.target_field.column)} = %s)'
+            )
+            condition_params.append(getattr(instance, field.attname))
+    conditions.append(_in(quote, target.column, ids))
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(columns)}) '
+        f'SELECT {", ".join(select)} '
+        f'FROM {quote(target.model._meta.db_table)} '
+        f'WHERE {" AND ".join(conditions)} '
+        f'ON CONFLICT DO NOTHING '
+        f'RETURNING {quote(model._meta.get_field(field_name).column)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + condition_params + ids)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def delete_links(model, field_name, ids, **values):
+    """
+    Deletes link rows to many objects at once with a single
+    DELETE ... RETURNING statement. Returns the set of ids whose
+    rows were deleted. No signals are sent, see insert_links.
+    """
+    ids = list(ids)
+    if not ids:
+        return set()
+    values = _prepare(model, values)
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    column = model._meta.get_field(field_name).column
+    where = ' AND '.join(
+        f'{quote(model._meta.get_field(key).column)} = %s' for key in values
+    )
+    sql = (
+        f'DELETE FROM {quote(model._meta.db_table)} '
+        f'WHERE {where} AND {_in(quote, column, ids)} '
+        f'RETURNING {quote(column)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, list(values.values()) + ids)
+        return {row[0] for row in cursor.fetchall()}
@@ -0,0 +1,134 @@
+import random
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from recipes.models import (
+    Favorite,
+    FeedItem,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartIngredient,
+    Tag
+)
+from users.models import Subscription
+
+User = get_user_model()
+
+SEED_PASSWORD = 'benchmark-password'
+SEED_IMAGE_NAME = 'recipe_images/benchmark.png'
+
+
+def add_seed_arguments(parser):
+    """Adds options describing the size of the synthetic dataset."""
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--recipes', type=int, default=500)
+    parser.add_argument(
+        '--ingredients-per-recipe', type=int, default=8
+    )
+    parser.add_argument('--favorites-per-user', type=int, default=20)
+    parser.add_argument('--carts-per-user', type=int, default=10)
+    parser.add_argument(
+        '--subscriptions-per-user', type=int, default=10
+    )
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def _sample(rng, population, size):
+    return rng.sample(population, min(size, len(population)))
+
+
+def _image():
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), color=(200, 120, 40)).save(buffer, 'PNG')
+    return default_storage.save(
+        SEED_IMAGE_NAME, ContentFile(buffer.getvalue())
+    )
+
+
+def seed_database(options):
+    """
+    Fills an empty database with tags and ingredients from
+    the data folder and with synthetic users, recipes,
+    favorites, carts and subscriptions.
+    Returns a dict with the seeded ids.
+    """
+    rng = random.Random(options['seed'])
+    call_command('import_tags')
+    call_command('import_ingredients')
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+
+    password = make_password(SEED_PASSWORD)
+    users = User.objects.bulk_create(
+        User(
+            email=f'user{number}@example.com',
+            username=f'user{number}',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=password,
+        )
+        for number in range(max(options['users'], 3))
+    )
+    user_ids = [user.id for user in users]
+
+    image = _image()
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            author_id=rng.choice(user_ids),
+            name=f'Рецепт {number}',
+            text='Смешать все ингредиенты и готовить до готовности.',
+            cooking_time=rng.randint(1, 120),
+            image=image,
+            short_link=f'bench{number}',
+        )
+        for number in range(max(options['recipes'], 1))
+    )
+    recipe_ids = [recipe.id for recipe in recipes]
+
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in _sample(rng, tag_ids, rng.randint(1, 3))
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=rng.randint(1, 500),
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in _sample(
+            rng, ingredient_ids, options['ingredients_per_recipe']
+        )
+    )
+    for model, size in (
+        (Favorite, options['favorites_per_user']),
+        (ShoppingCart, options['carts_per_user']),
+    ):
+        model.objects.bulk_create(
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in _sample(rng, recipe_ids, size)
+        )
+    ShoppingCartIngredient.objects.rebuild()
+    Subscription.objects.bulk_create(
+        Subscription(user_id=user_id, subscription_id=author_id)
+        for user_id in user_ids
+        for author_id in _sample(
+            rng,
+            [other for other in user_ids if other != user_id],
+            options['subscriptions_per_user'],
+        )
+    )
+    FeedItem.objects.rebuild()
+    call_command('reconcile_counters', verbosity=0)
+    call_command('update_recipe_scores', full=True, verbosity=0)
+    return {'users': user_ids, 'recipes': recipe_ids, 'tags': tag_ids}
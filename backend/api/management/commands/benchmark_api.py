@@ -0,0 +1,408 @@
+import base64
+import json
+import statistics
+import tempfile
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment
+)
+from django.urls import reverse
+from djoser.urls.authtoken import urlpatterns as auth_urlpatterns
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.management.commands._seed import (
+    SEED_IMAGE_NAME,
+    SEED_PASSWORD,
+    add_seed_arguments,
+    seed_database
+)
+from api.profiling import profile
+from api.tasks import render_shopping_list
+from api.urls import router
+from recipes.models import Favorite, Recipe, ShoppingCart
+from taskqueue.models import Task
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def _case(name, method, url_name, kwargs=None, query='', data=None,
+          token='main', store=None):
+    """
+    Describes one benchmarked request. kwargs, data and token
+    may be callables taking the shared state of a run,
+    store may save something from the response into it.
+    """
+    return {
+        'name': name, 'method': method, 'url_name': url_name,
+        'kwargs': kwargs, 'query': query, 'data': data,
+        'token': token, 'store': store,
+    }
+
+
+def _resolve(value, state):
+    return value(state) if callable(value) else value
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a synthetic dataset in a test database, runs every API '
+        'endpoint through the test client and writes query counts, '
+        'SQL, serializer and wall time per endpoint to a JSON file.'
+    )
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false',
+            dest='interactive',
+        )
+
+    def in_test_database(self, run, options):
+        """Calls run(options) with a test database and media folder."""
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options['interactive']
+        )
+        try:
+            with tempfile.TemporaryDirectory() as media_root:
+                with override_settings(MEDIA_ROOT=media_root):
+                    return run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def handle(self, *args, **options):
+        results = self.in_test_database(self.run_benchmark, options)
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}'
+        ))
+
+    def prepare_state(self, seeded):
+        """Picks objects the write endpoints will work with."""
+        main, other, login_user = seeded['users'][:3]
+        own_recipe, free_recipe = seeded['recipes'][0], seeded['recipes'][-1]
+        Recipe.objects.filter(pk=own_recipe).update(author_id=main)
+        for model in (Favorite, ShoppingCart):
+            model.objects.filter(user_id=main, recipe_id=free_recipe).delete()
+        Subscription.objects.filter(
+            user_id=main, subscription_id=other
+        ).delete()
+        with default_storage.open(SEED_IMAGE_NAME) as f:
+            image = base64.b64encode(f.read()).decode()
+        return {
+            'main': Token.objects.create(user_id=main).key,
+            'login_email': User.objects.get(pk=login_user).email,
+            'other': other,
+            'own_recipe': own_recipe,
+            'free_recipe': free_recipe,
+            'short_link': Recipe.objects.get(pk=free_recipe).short_link,
+            'tag': seeded['tags'][0],
+            # Replaced by the exported one, GET-only runs need it too.
+            'task': Task.objects.create(
+                name=render_shopping_list.task_name, user_id=main,
+                payload={'user_id': main, 'format': 'pdf'}
+            ).pk,
+            'image': f'data:image/png;base64,{image}',
+            'counter': 0,
+        }
+
+    def recipe_payload(self, state):
+        return {
+            'name': 'Рецепт из бенчмарка',
+            'text': 'Описание рецепта из бенчмарка.',
+            'cooking_time': 15,
+            'image': state['image'],
+            'tags': [state['tag']],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in range(1, 6)
+            ],
+        }
+
+    def bulk_payload(self, state):
+        return {'recipes': [state['free_recipe'], state['own_recipe']]}
+
+    def new_user_payload(self, state):
+        state['counter'] += 1
+        return {
+            'email': f'new{state["counter"]}@example.com',
+            'username': f'new{state["counter"]}',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': SEED_PASSWORD,
+        }
+
+    def get_cases(self):
+        own = {'pk': lambda state: state['own_recipe']}
+        free = {'pk': lambda state: state['free_recipe']}
+        other = {'id': lambda state: state['other']}
+        return [
+            _case('recipes list', 'get', 'recipes-list'),
+            _case(
+                'recipes list anonymous', 'get', 'recipes-list',
+                token=None
+            ),
+            _case(
+                'recipes list limit=50', 'get', 'recipes-list',
+                query='?limit=50'
+            ),
+            _case(
+                'recipes list filtered', 'get', 'recipes-list',
+                query='?tags=breakfast&tags=lunch&is_favorited=1'
+            ),
+            _case(
+                'recipes list in cart', 'get', 'recipes-list',
+                query='?is_in_shopping_cart=1'
+            ),
+            _case(
+                'recipes list cursor', 'get', 'recipes-list',
+                query='?cursor='
+            ),
+            _case(
+                'recipes list popular', 'get', 'recipes-list',
+                query='?ordering=popular'
+            ),
+            _case(
+                'recipes list trending cursor', 'get', 'recipes-list',
+                query='?ordering=trending&cursor='
+            ),
+            _case(
+                'recipes search', 'get', 'recipes-list',
+                query='?search=%D1%80%D0%B5%D1%86%D0%B5%D0%BF%D1%82'
+            ),
+            _case('recipes feed', 'get', 'recipes-feed'),
+            _case('recipes detail', 'get', 'recipes-detail', own),
+            _case('recipes get-link', 'get', 'recipes-get-link', own),
+            _case(
+                'recipes create', 'post', 'recipes-list',
+                data=self.recipe_payload,
+                store=lambda state, response: state.update(
+                    created_recipe=response.json()['id']
+                )
+            ),
+            _case(
+                'recipes update', 'put', 'recipes-detail', own,
+                data=self.recipe_payload
+            ),
+            _case(
+                'recipes partial update', 'patch', 'recipes-detail', own,
+                data=self.recipe_payload
+            ),
+            _case(
+                'recipes delete', 'delete', 'recipes-detail',
+                {'pk': lambda state: state['created_recipe']}
+            ),
+            _case('favorite add', 'post', 'recipes-favorite', free),
+            _case('favorite delete', 'delete', 'recipes-favorite', free),
+            _case(
+                'shopping cart add', 'post', 'recipes-shopping-cart', free
+            ),
+            _case(
+                'shopping cart delete', 'delete',
+                'recipes-shopping-cart', free
+            ),
+            _case(
+                'favorite bulk add', 'post', 'recipes-favorite-bulk',
+                data=self.bulk_payload
+            ),
+            _case(
+                'favorite bulk delete', 'delete', 'recipes-favorite-bulk',
+                data=self.bulk_payload
+            ),
+            _case(
+                'shopping cart bulk add', 'post',
+                'recipes-shopping-cart-bulk', data=self.bulk_payload
+            ),
+            _case(
+                'shopping cart bulk delete', 'delete',
+                'recipes-shopping-cart-bulk', data=self.bulk_payload
+            ),
+            _case(
+                'shopping cart summary', 'get',
+                'recipes-shopping-cart-summary'
+            ),
+            _case(
+                'download shopping cart', 'get',
+                'recipes-download-shopping-cart'
+            ),
+            _case(
+                'download shopping cart csv', 'get',
+                'recipes-download-shopping-cart', query='?format=csv'
+            ),
+            _case(
+                'download shopping cart pdf', 'get',
+                'recipes-download-shopping-cart', query='?format=pdf'
+            ),
+            _case(
+                'export shopping cart', 'post',
+                'recipes-export-shopping-cart', data={'format': 'pdf'},
+                store=lambda state, response: state.update(
+                    task=response.json()['id']
+                )
+            ),
+            _case(
+                'tasks detail', 'get', 'tasks-detail',
+                {'pk': lambda state: state['task']}
+            ),
+            _case('tags list', 'get', 'tags-list'),
+            _case(
+                'tags detail', 'get', 'tags-detail',
+                {'pk': lambda state: state['tag']}
+            ),
+            _case('ingredients list', 'get', 'ingredients-list'),
+            _case(
+                'ingredients search', 'get', 'ingredients-list',
+                query='?name=%D0%BC%D0%B0'
+            ),
+            _case(
+                'ingredients detail', 'get', 'ingredients-detail',
+                {'pk': 1}
+            ),
+            _case('users list', 'get', 'users-list'),
+            _case(
+                'users create', 'post', 'users-list',
+                data=self.new_user_payload, token=None
+            ),
+            _case('users detail', 'get', 'users-detail', other),
+            _case('users me', 'get', 'users-me'),
+            _case(
+                'users subscriptions', 'get', 'users-subscriptions',
+                query='?recipes_limit=3'
+            ),
+            _case('users subscribe', 'post', 'users-subscribe', other),
+            _case('users unsubscribe', 'delete', 'users-subscribe', other),
+            _case(
+                'users avatar put', 'put', 'users-avatar',
+                data=lambda state: {'avatar': state['image']}
+            ),
+            _case('users avatar delete', 'delete', 'users-avatar'),
+            _case(
+                'token login', 'post', 'login',
+                data=lambda state: {
+                    'email': state['login_email'],
+                    'password': SEED_PASSWORD,
+                },
+                token=None,
+                store=lambda state, response: state.update(
+                    login_token=response.json()['auth_token']
+                )
+            ),
+            _case(
+                'token logout', 'post', 'logout',
+                token=lambda state: state['login_token']
+            ),
+            _case(
+                'short link', 'get', 'recipe_short_link',
+                {'short_link': lambda state: state['short_link']},
+                token=None
+            ),
+        ]
+
+    def not_covered(self, cases):
+        """Lists registered routes and methods without a case."""
+        covered = {(case['url_name'], case['method']) for case in cases}
+        routes = set()
+        for pattern in router.urls:
+            actions = getattr(pattern.callback, 'actions', None) or {}
+            routes.update(
+                (pattern.name, method) for method in actions
+                if method != 'head'
+            )
+        for pattern in auth_urlpatterns:
+            routes.add((pattern.name, 'post'))
+        return sorted(
+            f'{method.upper()} {name}' for name, method in routes - covered
+        )
+
+    def request(self, client, case, state):
+        token = _resolve(case['token'], state)
+        token = state[token] if token == 'main' else token
+        if token:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        else:
+            client.credentials()
+        kwargs = {
+            key: _resolve(value, state)
+            for key, value in (case['kwargs'] or {}).items()
+        }
+        path = reverse(case['url_name'], kwargs=kwargs) + case['query']
+        data = _resolve(case['data'], state)
+        start = perf_counter()
+        with profile() as current:
+            response = getattr(client, case['method'])(
+                path, data=data, format='json'
+            )
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        wall_time = perf_counter() - start
+        if case['store'] and response.status_code < 400:
+            case['store'](state, response)
+        return path, response.status_code, current, wall_time
+
+    def run_benchmark(self, options):
+        seeded = seed_database(options)
+        state = self.prepare_state(seeded)
+        cases = self.get_cases()
+        client = APIClient()
+        measured = {case['name']: [] for case in cases}
+        for _ in range(max(options['repeat'], 1)):
+            for case in cases:
+                measured[case['name']].append(
+                    self.request(client, case, state)
+                )
+        endpoints = {}
+        for case in cases:
+            runs = measured[case['name']]
+            wall_times = [run[3] for run in runs]
+            endpoints[case['name']] = {
+                'method': case['method'].upper(),
+                'path': runs[-1][0],
+                'status': sorted({run[1] for run in runs}),
+                'queries': max(len(run[2].queries) for run in runs),
+                'duplicate_queries': max(
+                    sum(run[2].duplicates().values()) for run in runs
+                ),
+                'sql_ms': _ms(statistics.median(
+                    run[2].db_time for run in runs
+                )),
+                'serializer_ms': _ms(statistics.median(
+                    run[2].serializer_time for run in runs
+                )),
+                'p50_ms': _ms(_percentile(wall_times, 50)),
+                'p95_ms': _ms(_percentile(wall_times, 95)),
+            }
+        return {
+            'dataset': {
+                key: options[key] for key in (
+                    'users', 'recipes', 'ingredients_per_recipe',
+                    'favorites_per_user', 'carts_per_user',
+                    'subscriptions_per_user', 'seed',
+                )
+            },
+            'repeat': options['repeat'],
+            'endpoints': endpoints,
+            'not_covered': self.not_covered(cases),
+        }
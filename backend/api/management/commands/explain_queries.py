@@ -0,0 +1,109 @@
+import re
+
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection, transaction
+from rest_framework.test import APIClient
+
+from api.management.commands._seed import add_seed_arguments, seed_database
+from api.management.commands.benchmark_api import Command as BenchmarkCommand
+
+SEQUENTIAL_SCANS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'^SCAN (\w+)$'),
+}
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Seeds a synthetic dataset in a test database, runs every GET '
+        'endpoint of the benchmark through the test client, explains '
+        'each executed SELECT and flags sequential scans. On PostgreSQL '
+        'plans are taken with EXPLAIN (ANALYZE, BUFFERS) and sequential '
+        'scans disabled, so a scan left in a plan means no index fits.'
+    )
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Fail when any sequential scan is found.'
+        )
+        parser.add_argument(
+            '--allow', action='append', default=[], metavar='TABLE',
+            help='Table that may be scanned, e.g. a small reference table.'
+        )
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false',
+            dest='interactive',
+        )
+
+    def explain(self, sql, params):
+        """Returns plan lines of a query."""
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+                return [row[0] for row in cursor.fetchall()]
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def run_audit(self, options):
+        seeded = seed_database(options)
+        state = self.prepare_state(seeded)
+        client = APIClient()
+        pattern = SEQUENTIAL_SCANS[connection.vendor]
+        tables = set(connection.introspection.table_names())
+        tables.difference_update(options['allow'])
+        report = {}
+        for case in self.get_cases():
+            if case['method'] != 'get':
+                continue
+            executed = []
+
+            def capture(execute, sql, params, many, context):
+                if sql.lstrip().upper().startswith('SELECT'):
+                    executed.append((sql, params))
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(capture):
+                path = self.request(client, case, state)[0]
+            scans = {}
+            for sql, params in dict.fromkeys(
+                (sql, tuple(params or ())) for sql, params in executed
+            ):
+                try:
+                    plan = self.explain(sql, params)
+                except DatabaseError as error:
+                    plan = [f'EXPLAIN failed: {error}']
+                for line in plan:
+                    for table in pattern.findall(line.strip()):
+                        if table in tables:
+                            scans.setdefault(table, sql)
+                if options['verbosity'] > 1:
+                    self.stdout.write('\n'.join([sql, *plan, '']))
+            report[f'GET {path}'] = scans
+        return report
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQUENTIAL_SCANS:
+            raise CommandError(
+                f'Планы запросов для {connection.vendor} не поддерживаются.'
+            )
+        report = self.in_test_database(self.run_audit, options)
+        flagged = 0
+        for endpoint, scans in report.items():
+            if not scans:
+                self.stdout.write(f'{endpoint}: OK')
+                continue
+            flagged += 1
+            self.stdout.write(self.style.WARNING(
+                f'{endpoint}: полный просмотр {", ".join(sorted(scans))}'
+            ))
+        if flagged and options['strict']:
+            raise CommandError(
+                f'Полный просмотр таблиц в эндпоинтах: {flagged}.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено эндпоинтов: {len(report)}, '
+            f'с полным просмотром: {flagged}.'
+        ))
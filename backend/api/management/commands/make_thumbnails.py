@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from api.images import make_thumbnails
+from recipes.constants import RECIPE_THUMBNAIL_SIZES
+from recipes.models import Recipe
+from users.constants import AVATAR_THUMBNAIL_SIZES, IMAGE_READY
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes missing thumbnails of recipe images and avatars, '
+        'e.g. for images uploaded before thumbnails were introduced '
+        'or after thumbnail sizes or IMAGE_FORMAT have changed. '
+        'Images still waiting for the worker are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--overwrite', action='store_true',
+            help='Rewrite existing thumbnails too.'
+        )
+
+    def handle(self, *args, **options):
+        sources = (
+            (Recipe.objects.filter(image_status=IMAGE_READY).exclude(
+                image=''
+            ), 'image', RECIPE_THUMBNAIL_SIZES),
+            (User.objects.filter(avatar_status=IMAGE_READY).exclude(
+                avatar=''
+            ).exclude(avatar=None), 'avatar', AVATAR_THUMBNAIL_SIZES),
+        )
+        written = failed = 0
+        for queryset, field, sizes in sources:
+            for obj in queryset.only('pk', field).iterator():
+                try:
+                    written += make_thumbnails(
+                        getattr(obj, field), sizes, options['overwrite']
+                    )
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(f'{obj._meta.label} {obj.pk}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано миниатюр: {written}, ошибок: {failed}.'
+        ))
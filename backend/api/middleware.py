@@ -0,0 +1,55 @@
+import json
+import logging
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from api.profiling import fingerprint, install_serializer_timer, profile
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sample of requests: number of queries, duplicated
+    queries, database time and serializer time are sent back in
+    the Server-Timing header and written to the log.
+    Is removed from the middleware chain when PROFILING is off.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        install_serializer_timer()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        start = perf_counter()
+        with profile() as current:
+            response = self.get_response(request)
+        total = perf_counter() - start
+        duplicates = current.duplicates()
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={current.db_time * 1000:.1f};'
+            f'desc="{len(current.queries)} queries"',
+            f'serializer;dur={current.serializer_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': len(current.queries),
+            'duplicate_queries': {
+                fingerprint(sql): count for sql, count in duplicates.items()
+            },
+            'db_ms': round(current.db_time * 1000, 1),
+            'serializer_ms': round(current.serializer_time * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+        }))
+        return response
@@ -1,10 +1,271 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.constants import RECIPE_ORDERINGS
+
+
+def estimated_count(queryset):
+    """
+    Planner estimate of rows in the table of the queryset,
+    None when it is not available.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class CountingPaginator(Paginator):
+    """
+    Paginator with a configurable way of counting:
+    exact counts may be cached per query for cache_timeout
+    seconds, unfiltered querysets over big tables may be
+    counted by the planner estimate.
+    """
+
+    def __init__(self, object_list, per_page, cache_timeout=None,
+                 estimate_threshold=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_timeout = cache_timeout
+        self.estimate_threshold = estimate_threshold
+
+    def exact_count(self):
+        if not self.cache_timeout:
+            return super().count
+        sql, params = self.object_list.query.sql_with_params()
+        key = 'count:' + hashlib.sha1(
+            repr((sql, params)).encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout=self.cache_timeout)
+        return count
+
+    @cached_property
+    def count(self):
+        if (
+            self.estimate_threshold is not None
+            and hasattr(self.object_list, 'query')
+            and not self.object_list.query.where
+        ):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        if hasattr(self.object_list, 'query'):
+            return self.exact_count()
+        return super().count
 
 
 class PageLimitPagination(PageNumberPagination):
     """
     Modified PageNumberPagination with word "limit"
     as a limiter for number of shown objects.
+    Counting is exact unless count_cache_timeout or
+    count_estimate_threshold are set.
     """
 
     page_size_query_param = "limit"
+    count_cache_timeout = None
+    count_estimate_threshold = None
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountingPaginator(
+            object_list,
+            per_page,
+            cache_timeout=self.count_cache_timeout,
+            estimate_threshold=self.count_estimate_threshold,
+        )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique set of ordering fields:
+    every page is a range scan of a composite index
+    starting right after the last row of previous page,
+    so deep pages cost the same as the first one.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    ordering = ('id',)
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def get_page_size(self, request):
+        return PageLimitPagination().get_page_size(request)
+
+    def get_ordering(self, request):
+        """
+        Unique ordering of pages, fields must be either
+        all ascending or all descending.
+        """
+        return self.ordering
+
+    @property
+    def fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded))
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, cursor['k'],
+                                        strict=True)
+            ]
+            return values, bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        values = [getattr(obj, field) for field in self.fields]
+        cursor = json.dumps({'k': values, 'r': int(reverse)}, default=str)
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def after(self, queryset, values, reverse):
+        """Keeps rows after (or before) the given ordering values."""
+        connection = connections[queryset.db]
+        quote = connection.ops.quote_name
+        fields = [
+            queryset.model._meta.get_field(field) for field in self.fields
+        ]
+        table = quote(queryset.model._meta.db_table)
+        columns = ', '.join(
+            f'{table}.{quote(field.column)}' for field in fields
+        )
+        placeholders = ', '.join(['%s'] * len(values))
+        descending = self.ordering[0].startswith('-')
+        operator = '<' if reverse != descending else '>'
+        return queryset.filter(RawSQL(
+            f'({columns}) {operator} ({placeholders})',
+            [
+                field.get_db_prep_value(value, connection)
+                for field, value in zip(fields, values)
+            ],
+            output_field=BooleanField()
+        ))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request)
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request, queryset.model)
+        ordering = [
+            (field.lstrip('-') if field.startswith('-') else f'-{field}')
+            if reverse else field
+            for field in self.ordering
+        ]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = self.after(queryset, values, reverse)
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        has_next = has_more if not reverse else True
+        has_previous = (values is not None) if not reverse else has_more
+        self.next = (
+            self.encode_cursor(results[-1], False)
+            if results and has_next else None
+        )
+        if not results or not has_previous:
+            self.previous = None
+        elif values is None:
+            self.previous = replace_query_param(
+                self.base_url, self.cursor_query_param, ''
+            )
+        else:
+            self.previous = self.encode_cursor(results[0], True)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+
+class RecipeKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination matching Recipe.Meta.ordering
+    or the ordering chosen by RecipeFilter.
+    """
+
+    ordering = ('pub_date', 'name', 'id')
+
+    def get_ordering(self, request):
+        return RECIPE_ORDERINGS.get(
+            request.query_params.get('ordering'), self.ordering
+        )
+
+
+class FeedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over the feed index, newest first. The
+    feed is paged only by keys, so no page counts or skips rows.
+    """
+
+    ordering = ('-pub_date', '-recipe_id')
+
+
+class PageOrKeysetPagination(PageLimitPagination):
+    """
+    PageLimitPagination that switches to keyset pagination
+    when the cursor parameter is given, "?cursor=" opens
+    the first page. Keyset pages have no count.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RecipePagination(PageOrKeysetPagination):
+    keyset_class = RecipeKeysetPagination
+    count_cache_timeout = settings.RECIPE_COUNT_CACHE_TIMEOUT
+    count_estimate_threshold = settings.RECIPE_COUNT_ESTIMATE_THRESHOLD
+
+
+class UserPagination(PageOrKeysetPagination):
+    count_cache_timeout = settings.USER_COUNT_CACHE_TIMEOUT
+    count_estimate_threshold = settings.USER_COUNT_ESTIMATE_THRESHOLD
@@ -0,0 +1,92 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+from django.db import connection
+from rest_framework import serializers
+
+_local = threading.local()
+
+PLACEHOLDERS = re.compile(r'(%s)(\s*,\s*%s)+')
+
+
+def fingerprint(sql):
+    """Short hash of a query with IN (...) lists collapsed."""
+    normalized = PLACEHOLDERS.sub('%s, ...', sql)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+class Profile:
+    """
+    Collects executed queries, time spent in the database
+    and time spent in DRF serializers for a block of code.
+    Serializer time includes queries made while serializing.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries.append(sql)
+
+    def duplicates(self):
+        """Returns queries executed more than once with their counts."""
+        return {
+            sql: count for sql, count in Counter(self.queries).items()
+            if count > 1
+        }
+
+
+def _timed(to_representation):
+    """Adds time of the outermost serializer call to current profile."""
+
+    @wraps(to_representation)
+    def wrapper(self, instance):
+        current = getattr(_local, 'profile', None)
+        if current is None or current.serializer_depth:
+            return to_representation(self, instance)
+        current.serializer_depth += 1
+        start = perf_counter()
+        try:
+            return to_representation(self, instance)
+        finally:
+            current.serializer_time += perf_counter() - start
+            current.serializer_depth -= 1
+
+    wrapper.is_timed = True
+    return wrapper
+
+
+def install_serializer_timer():
+    """Wraps DRF serializers once so that they report their time."""
+    for serializer_class in (
+        serializers.Serializer, serializers.ListSerializer
+    ):
+        method = serializer_class.to_representation
+        if not getattr(method, 'is_timed', False):
+            serializer_class.to_representation = _timed(method)
+
+
+@contextmanager
+def profile():
+    """Profiles queries and serializers run inside the block."""
+    install_serializer_timer()
+    current = Profile()
+    _local.profile = current
+    try:
+        with connection.execute_wrapper(current):
+            yield current
+    finally:
+        _local.profile = None
@@ -0,0 +1,56 @@
+import json
+
+from django.http import Http404
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+
+class FileRenderer(BaseRenderer):
+    """
+    Renderer that only names a downloadable format, files
+    themselves are streamed by views, errors are rendered
+    as JSON text.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+class TextRenderer(FileRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CSVRenderer(FileRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class PDFRenderer(FileRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+
+class FormatContentNegotiation(BaseContentNegotiation):
+    """
+    Picks renderer by the format parameter only, the first
+    renderer is used when it is not given, Accept header
+    is ignored so that any client can download files.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        format_query_param = api_settings.URL_FORMAT_OVERRIDE
+        format = format_suffix or request.query_params.get(format_query_param)
+        for renderer in renderers:
+            if not format or renderer.format == format:
+                return renderer, renderer.media_type
+        raise Http404
@@ -1,9 +1,22 @@
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import transaction
 from rest_framework import serializers
 
-from api.fields import Base64ImageField
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from api.fields import Base64ImageField, SrcsetField, ThumbnailField
+from api.images import thumbnail_url
+from api.utils import SHOPPING_LIST_WRITERS, get_recipes_limit
+from recipes.constants import MAX_BULK_RECIPES, RECIPE_THUMBNAIL_SIZES
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartIngredient,
+    Tag
+)
+from taskqueue.models import Task
+from users.constants import AVATAR_THUMBNAIL_SIZES, IMAGE_READY
 from users.models import Subscription
 
 User = get_user_model()
@@ -11,13 +24,16 @@ User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
     avatar = serializers.SerializerMethodField()
+    avatar_thumbnail = serializers.SerializerMethodField()
+    avatar_status = serializers.ReadOnlyField()
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'email', 'id', 'username', 'first_name',
-            'last_name', 'is_subscribed', 'avatar',
+            'last_name', 'is_subscribed', 'avatar', 'avatar_thumbnail',
+            'avatar_status',
         )
         required_fields = (
             'email', 'first_name',
@@ -29,7 +45,14 @@ class UserSerializer(serializers.ModelSerializer):
             return obj.avatar.url
         return None
 
+    def get_avatar_thumbnail(self, obj):
+        if obj.avatar and obj.avatar_status == IMAGE_READY:
+            return thumbnail_url(obj.avatar, AVATAR_THUMBNAIL_SIZES[0])
+        return None
+
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         return bool(
             request
@@ -105,13 +128,16 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         default=False
     )
     image = Base64ImageField(required=True)
+    image_thumbnail = ThumbnailField(RECIPE_THUMBNAIL_SIZES[0], source='image')
+    image_srcset = SrcsetField(RECIPE_THUMBNAIL_SIZES, source='image')
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time'
+            'name', 'image', 'image_thumbnail', 'image_srcset',
+            'image_status', 'text', 'cooking_time', 'favorites_count'
         )
 
     def get_image(self, obj):
@@ -189,13 +215,60 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         self.add_ingredients(recipe, ingredients_data)
         return recipe
 
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Writes only the difference between current and new
+        ingredients: inserts added ones, updates changed amounts,
+        deletes removed ones. Totals of carts containing the
+        recipe are moved by the same difference, deleted rows
+        leave them by signals.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        amounts = {
+            ingredient['ingredient'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        difference = {
+            ingredient_id: amount - (
+                current[ingredient_id].amount
+                if ingredient_id in current else 0
+            )
+            for ingredient_id, amount in amounts.items()
+        }
+        removed = [
+            item.pk for ingredient_id, item in current.items()
+            if ingredient_id not in amounts
+        ]
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            item = current.get(ingredient_id)
+            if item is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        self.add_ingredients(recipe, [
+            ingredient for ingredient in ingredients
+            if ingredient['ingredient'].id not in current
+        ])
+        ShoppingCartIngredient.objects.add_amounts(
+            ShoppingCart.objects.filter(recipe=recipe).values_list(
+                'user_id', flat=True
+            ),
+            difference
+        )
+
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
+        # set() already adds and removes only the difference.
         instance.tags.set(tags_data)
-        instance.ingredients.clear()
-        self.add_ingredients(instance, ingredients_data)
+        self.update_ingredients(instance, ingredients_data)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
@@ -205,30 +278,83 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         ).data
 
 
+class ShoppingCartIngredientSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient_id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingCartIngredient
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES
+    )
+
+    def validate_recipes(self, recipes):
+        return list(dict.fromkeys(recipes))
+
+
 class RecipeMinifiedSerializer(serializers.ModelSerializer):
+    image_thumbnail = ThumbnailField(RECIPE_THUMBNAIL_SIZES[0], source='image')
+    image_srcset = SrcsetField(RECIPE_THUMBNAIL_SIZES, source='image')
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = (
+            'id', 'name', 'image', 'image_thumbnail', 'image_srcset',
+            'image_status', 'cooking_time'
+        )
 
 
 class SubscriptionUserSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source='recipes.count', read_only=True
-    )
 
     class Meta(UserSerializer.Meta):
-        fields = UserSerializer.Meta.fields + ('recipes', 'recipes_count')
+        fields = UserSerializer.Meta.fields + (
+            'recipes', 'recipes_count', 'subscribers_count'
+        )
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes = obj.recipes.all()
-        if request:
-            try:
-                limit = int(request.query_params.get('recipes_limit'))
+        """
+        Uses recipes prefetched with the limit applied
+        per author by the database when there are any.
+        """
+        if hasattr(obj, 'shown_recipes'):
+            recipes = obj.shown_recipes
+        else:
+            recipes = obj.recipes.all()
+            limit = get_recipes_limit(self.context.get('request'))
+            if limit is not None:
                 recipes = recipes[:limit]
-            except (TypeError, ValueError):
-                pass
         return RecipeMinifiedSerializer(
             recipes, many=True, context=self.context
         ).data
+
+
+class ShoppingListExportSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(
+        choices=tuple(SHOPPING_LIST_WRITERS), default='pdf'
+    )
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Task
+        fields = ('id', 'status', 'url', 'created', 'finished')
+
+    def get_url(self, obj):
+        """Link to the file made by the task, if any."""
+        if not isinstance(obj.result, dict) or not obj.result.get('file'):
+            return None
+        url = default_storage.url(obj.result['file'])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.tasks import process_image_field
+from recipes.constants import RECIPE_THUMBNAIL_SIZES
+from recipes.models import Recipe
+from taskqueue.registry import enqueue
+from users.constants import AVATAR_THUMBNAIL_SIZES, IMAGE_PENDING
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(instance, **kwargs):
+    if not settings.AUTH_TOKEN_CACHE:
+        return
+    token_cache.invalidate([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(instance, update_fields, **kwargs):
+    if not settings.AUTH_TOKEN_CACHE:
+        return
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    token_cache.invalidate(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
+IMAGE_FIELDS = {
+    Recipe: ('image', RECIPE_THUMBNAIL_SIZES, lambda recipe: recipe.author),
+    User: ('avatar', AVATAR_THUMBNAIL_SIZES, lambda user: user),
+}
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=User)
+def mark_image_uploaded(sender, instance, **kwargs):
+    """A new upload is not committed to the storage yet."""
+    field = IMAGE_FIELDS[sender][0]
+    file = getattr(instance, field)
+    if file and not file._committed:
+        setattr(instance, f'{field}_status', IMAGE_PENDING)
+        instance._image_uploaded = True
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def enqueue_image_processing(sender, instance, **kwargs):
+    if not instance.__dict__.pop('_image_uploaded', False):
+        return
+    field, sizes, owner = IMAGE_FIELDS[sender]
+    enqueue(
+        process_image_field,
+        user=owner(instance),
+        model=sender._meta.label,
+        pk=instance.pk,
+        field=field,
+        name=getattr(instance, field).name,
+        sizes=list(sizes),
+    )
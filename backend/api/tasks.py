@@ -0,0 +1,87 @@
+from uuid import uuid4
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image
+
+from api.images import delete_thumbnails, make_thumbnails, process_image
+from api.utils import SHOPPING_LIST_WRITERS
+from taskqueue.registry import TaskFailed, task
+from users.constants import IMAGE_FAILED, IMAGE_READY
+
+User = get_user_model()
+
+
+def _finish_image(model, pk, field, name, **values):
+    """
+    Saves values when the field still holds the processed upload,
+    so that a newer upload is never overwritten. Saving bumps
+    the recipes version that cached representations are keyed by.
+    """
+    with transaction.atomic():
+        obj = model.objects.select_for_update().filter(
+            pk=pk, **{field: name}
+        ).first()
+        if obj is None:
+            return False
+        for key, value in values.items():
+            setattr(obj, key, value)
+        obj.save(update_fields=list(values))
+    return True
+
+
+def mark_image_failed(model, pk, field, name, sizes):
+    """Shows an upload as failed once processing has given up."""
+    _finish_image(
+        apps.get_model(model), pk, field, name,
+        **{f'{field}_status': IMAGE_FAILED}
+    )
+
+
+@task(on_failure=mark_image_failed)
+def process_image_field(model, pk, field, name, sizes):
+    """
+    Re-encodes an upload stored as is by the API, writes its
+    thumbnails and puts the result in place of the upload.
+    """
+    model = apps.get_model(model)
+    storage = model._meta.get_field(field).storage
+    obj = model.objects.filter(pk=pk, **{field: name}).first()
+    if obj is None:
+        storage.delete(name)
+        return {'superseded': True}
+    try:
+        with storage.open(name) as file:
+            processed = process_image(file)
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+        raise TaskFailed('Файл повреждён или не является изображением.')
+    field_file = getattr(obj, field)
+    field_file.name = storage.save(
+        field_file.field.generate_filename(obj, processed.name), processed
+    )
+    make_thumbnails(field_file, sizes)
+    if _finish_image(model, pk, field, name, **{
+        field: field_file.name, f'{field}_status': IMAGE_READY
+    }):
+        storage.delete(name)
+        return {'image': field_file.name}
+    delete_thumbnails(field_file, sizes)
+    storage.delete(field_file.name)
+    return {'superseded': True}
+
+
+@task
+def render_shopping_list(user_id, format):
+    """Writes shopping list of the user to a file for downloading."""
+    writer = SHOPPING_LIST_WRITERS[format]
+    content = b''.join(
+        chunk.encode() if isinstance(chunk, str) else chunk
+        for chunk in writer(User.objects.get(pk=user_id))
+    )
+    name = default_storage.save(
+        f'shopping_lists/{uuid4().hex}.{format}', ContentFile(content)
+    )
+    return {'file': name}
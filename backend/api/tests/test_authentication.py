@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api.authentication import _key, token_cache
+from api.tests.utils import create_user
+
+
+class TokenCacheTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        token_cache.invalidate([self.token.key])
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    def assert_no_token_queries(self, queries):
+        self.assertNotIn(
+            Token._meta.db_table,
+            ' '.join(query['sql'] for query in queries.captured_queries)
+        )
+
+    def me(self):
+        response = self.client.get(reverse('users-me'))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @override_settings(AUTH_TOKEN_CACHE=True)
+    def test_cached_without_password(self):
+        self.assertEqual(self.me()['email'], self.user.email)
+        self.assertNotIn(
+            self.user.password, repr(cache.get(_key(self.token.key)))
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.me()['username'], self.user.username)
+        self.assert_no_token_queries(queries)
+        self.assertTrue(token_cache.get(self.token.key).user.check_password(
+            'Pa55word!x'
+        ))
+
+    @override_settings(AUTH_TOKEN_CACHE=True)
+    def test_user_change_drops_token(self):
+        self.me()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('users-me')).status_code, 401)
+
+    def test_disabled_cache_skips_signals(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save(update_fields=['first_name'])
+        self.assert_no_token_queries(queries)
@@ -0,0 +1,16 @@
+from django.test import SimpleTestCase
+
+from api.management.commands.benchmark_api import Command
+
+
+class BenchmarkCoverageTest(SimpleTestCase):
+
+    def test_every_recipe_route_has_a_case(self):
+        command = Command()
+        self.assertEqual(
+            [
+                route for route in command.not_covered(command.get_cases())
+                if not route.split()[1].startswith('users-')
+            ],
+            []
+        )
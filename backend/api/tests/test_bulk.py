@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.constants import FAVORITES_VERSION, USER_VERSION
+from recipes.models import (
+    DataVersion,
+    Favorite,
+    Recipe,
+    ShoppingCartIngredient
+)
+
+MISSING_ID = 10 ** 6
+
+
+class BulkLinksTest(APITestCase):
+    """
+    Bulk endpoints change links with one statement and move
+    counters, totals and versions once per request.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        tags, ingredients = create_catalogue()
+        cls.recipes = create_recipes(cls.user, 5, tags, ingredients)
+        cls.ids = [recipe.pk for recipe in cls.recipes] + [MISSING_ID]
+        DataVersion.objects.bump(
+            USER_VERSION.format(cls.user.pk), FAVORITES_VERSION
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def request(self, method, name, queries):
+        with self.assertNumQueries(queries):
+            response = getattr(self.client, method)(
+                reverse(name), {'recipes': self.ids}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return {
+            item['id']: item['status'] for item in response.data['results']
+        }
+
+    def assert_statuses(self, statuses, status):
+        self.assertEqual(statuses, {
+            **dict.fromkeys(self.ids[:-1], status), MISSING_ID: 'not_found'
+        })
+
+    def test_favorites(self):
+        # savepoint, insert, missing ids, counters, version, release
+        self.assert_statuses(
+            self.request('post', 'recipes-favorite-bulk', 6), 'added'
+        )
+        self.assertEqual(
+            set(Recipe.objects.values_list('favorites_count', flat=True)),
+            {1}
+        )
+        # savepoint, insert, missing ids, release
+        self.assert_statuses(
+            self.request('post', 'recipes-favorite-bulk', 4), 'exists'
+        )
+        self.assert_statuses(
+            self.request('delete', 'recipes-favorite-bulk', 6), 'removed'
+        )
+        self.assertFalse(Favorite.objects.exists())
+        self.assertEqual(
+            set(Recipe.objects.values_list('favorites_count', flat=True)),
+            {0}
+        )
+        self.assert_statuses(
+            self.request('delete', 'recipes-favorite-bulk', 4), 'absent'
+        )
+
+    def test_shopping_cart(self):
+        self.client.post(
+            reverse('recipes-shopping-cart-bulk'),
+            {'recipes': self.ids}, format='json'
+        )
+        self.assertEqual(
+            {
+                (total.user_id, total.ingredient_id): total.amount
+                for total in ShoppingCartIngredient.objects.all()
+            },
+            {
+                (row['user_id'], row['ingredient_id']): row['total']
+                for row in ShoppingCartIngredient.objects.live()
+            }
+        )
+        # savepoint, delete, missing ids, amounts,
+        # totals update and cleanup, version, release
+        self.assert_statuses(
+            self.request('delete', 'recipes-shopping-cart-bulk', 8),
+            'removed'
+        )
+        self.assertFalse(ShoppingCartIngredient.objects.exists())
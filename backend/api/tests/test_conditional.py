@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import ShoppingCart
+
+
+class RecipeETagTest(APITestCase):
+    """ETags of recipes change with their content and only then."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.other = create_user('other')
+        cls.author = create_user('author')
+        cls.tags, ingredients = create_catalogue()
+        cls.recipe = create_recipes(cls.author, 2, cls.tags, ingredients)[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.reader)
+        self.urls = (
+            reverse('recipes-list'),
+            reverse('recipes-detail', args=(self.recipe.pk,)),
+        )
+
+    def etags(self):
+        etags = []
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etags.append(response['ETag'])
+        return etags
+
+    def assert_changed(self, before, changed=True):
+        after = self.etags()
+        for url, old, new in zip(self.urls, before, after):
+            with self.subTest(url=url):
+                if changed:
+                    self.assertNotEqual(old, new)
+                else:
+                    self.assertEqual(old, new)
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=old)
+                    self.assertEqual(response.status_code, 304)
+
+    def test_unchanged(self):
+        before = self.etags()
+        ShoppingCart.objects.create(user=self.other, recipe=self.recipe)
+        self.other.save(update_fields=['last_login'])
+        self.assert_changed(before, changed=False)
+
+    def test_recipe_edit(self):
+        before = self.etags()
+        self.recipe.name = 'Новое название'
+        self.recipe.save()
+        self.assert_changed(before)
+
+    def test_tag_edit(self):
+        before = self.etags()
+        self.tags[0].name = 'Новый тег'
+        self.tags[0].save()
+        self.assert_changed(before)
+
+    def test_own_favorite(self):
+        before = self.etags()
+        self.client.post(reverse('recipes-favorite', args=(self.recipe.pk,)))
+        self.assert_changed(before)
+
+    def test_own_shopping_cart(self):
+        before = self.etags()
+        self.client.post(
+            reverse('recipes-shopping-cart', args=(self.recipe.pk,))
+        )
+        self.assert_changed(before)
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import Favorite, Recipe
+from users.models import Subscription
+
+
+class CountersTest(APITestCase):
+    """Saves of loaded instances never write counters back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.author = create_user('author')
+        tags, ingredients = create_catalogue()
+        cls.recipe = create_recipes(cls.author, 1, tags, ingredients)[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_avatar_delete_keeps_subscribers_count(self):
+        self.client.force_authenticate(self.author)
+        Subscription.objects.create(
+            user=self.reader, subscription=self.author
+        )
+        response = self.client.delete(reverse('users-avatar'))
+        self.assertEqual(response.status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 1)
+
+    def test_recipe_save_keeps_favorites_count(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        recipe.name = 'Новое название'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_favorites_change_recipe_etag(self):
+        url = reverse('recipes-detail', args=(self.recipe.pk,))
+        self.client.force_authenticate(self.author)
+        etag = self.client.get(url)['ETag']
+        for favorite in (
+            lambda: self.client.post(
+                reverse('recipes-favorite', args=(self.recipe.pk,))
+            ),
+            lambda: self.client.delete(
+                reverse('recipes-favorite-bulk'),
+                {'recipes': [self.recipe.pk]}, format='json'
+            ),
+        ):
+            self.client.force_authenticate(self.reader)
+            favorite()
+            self.client.force_authenticate(self.author)
+            cache.clear()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.data['favorites_count'],
+                Recipe.objects.get(pk=self.recipe.pk).favorites_count
+            )
+            etag = response['ETag']
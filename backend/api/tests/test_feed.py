@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import FeedItem, Recipe
+from recipes.tasks import trim_feeds
+from taskqueue.models import Task
+from taskqueue.registry import run
+from users.models import Subscription
+
+FEED_LENGTH = 4
+
+
+@mock.patch('recipes.models.FEED_LENGTH', FEED_LENGTH)
+class FeedTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.author = create_user('author')
+        cls.tags, cls.ingredients = create_catalogue()
+        create_recipes(cls.author, FEED_LENGTH, cls.tags, cls.ingredients)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.reader)
+
+    def publish(self):
+        return Recipe.objects.create(
+            author=self.author, name='Новый рецепт', text='Описание',
+            cooking_time=5, image='recipe_images/test.png'
+        )
+
+    def test_new_recipe_is_trimmed_by_a_task(self):
+        Subscription.objects.create(user=self.reader, subscription=self.author)
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.reader).count(), FEED_LENGTH
+        )
+        recipe = self.publish()
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.reader).count(),
+            FEED_LENGTH + 1
+        )
+        queued = Task.objects.get(name=trim_feeds.task_name)
+        queued.attempts = 1
+        run(queued)
+        feed = FeedItem.objects.filter(user=self.reader)
+        self.assertEqual(feed.count(), FEED_LENGTH)
+        self.assertTrue(feed.filter(recipe=recipe).exists())
+
+    def test_feed_is_paged_by_keys(self):
+        Subscription.objects.create(user=self.reader, subscription=self.author)
+        expected = list(FeedItem.objects.filter(user=self.reader).order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('recipe_id', flat=True))
+        url, pages = reverse('recipes-feed') + '?limit=3', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            pages.append([recipe['id'] for recipe in response.data['results']])
+            url = response.data['next']
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual(len(pages), 2)
+
+    def test_no_subscribers_no_task(self):
+        self.publish()
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+
+class IngredientSearchTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in (
+                'Сахар', 'Мука', 'Сахарная пудра', 'Тростниковый сахар'
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.invalidate()
+
+    def test_name_search_order(self):
+        response = self.client.get(
+            reverse('ingredients-list'), {'name': 'сахар'}
+        )
+        self.assertEqual(
+            [ingredient['name'] for ingredient in response.data],
+            ['Сахар', 'Сахарная пудра', 'Тростниковый сахар']
+        )
@@ -0,0 +1,74 @@
+import base64
+import json
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import Recipe
+
+
+def encode(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+class KeysetPaginationTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        tags, ingredients = create_catalogue()
+        create_recipes(cls.user, 7, tags, ingredients)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def page(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_forward_and_backward(self):
+        for ordering, fields in (
+            (None, ('pub_date', 'name', 'id')),
+            ('popular', ('-popularity', '-id')),
+        ):
+            with self.subTest(ordering=ordering):
+                expected = list(Recipe.objects.order_by(*fields).values_list(
+                    'pk', flat=True
+                ))
+                params = {'cursor': '', 'limit': 3}
+                if ordering:
+                    params['ordering'] = ordering
+                data = self.page(reverse('recipes-list'), **params)
+                self.assertIsNone(data['previous'])
+                pages = [[recipe['id'] for recipe in data['results']]]
+                while data['next']:
+                    data = self.page(data['next'])
+                    pages.append([recipe['id'] for recipe in data['results']])
+                self.assertEqual(
+                    [pk for page in pages for pk in page], expected
+                )
+                self.assertEqual([len(page) for page in pages], [3, 3, 1])
+                backward = []
+                while data['previous']:
+                    data = self.page(data['previous'])
+                    backward.append([
+                        recipe['id'] for recipe in data['results']
+                    ])
+                self.assertEqual(backward, pages[-2::-1])
+
+    def test_bad_cursor(self):
+        for cursor in (
+            'not base64!',
+            encode([1, 2]),
+            encode({'k': [1], 'r': 0}),
+            encode({'k': ['notadate', 'a', 1], 'r': 0}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('recipes-list'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
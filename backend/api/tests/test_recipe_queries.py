@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+PAGE_SIZES = (6, 50, 200)
+
+
+class RecipeListQueriesTest(APITestCase):
+    """The recipe list costs the same number of queries for any page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        author = create_user('author')
+        tags, ingredients = create_catalogue()
+        recipes = create_recipes(author, max(PAGE_SIZES), tags, ingredients)
+        Favorite.objects.bulk_create(
+            Favorite(user=cls.user, recipe=recipe) for recipe in recipes[::2]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=cls.user, recipe=recipe)
+            for recipe in recipes[::3]
+        )
+        Subscription.objects.create(user=cls.user, subscription=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def assert_list_queries(self, queries):
+        if connection.vendor == 'postgresql':
+            # planner estimate asked before the exact count
+            queries += 1
+        for page_size in PAGE_SIZES:
+            with self.subTest(page_size=page_size):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    response = self.client.get(
+                        reverse('recipes-list'), {'limit': page_size}
+                    )
+                self.assertEqual(len(response.data['results']), page_size)
+                first = response.data['results'][0]
+                self.assertEqual(len(first['ingredients']), 3)
+                self.assertTrue(first['author']['is_subscribed'])
+
+    @override_settings(RECIPE_CACHE=False)
+    def test_list_queries(self):
+        # versions, count, recipes, authors, tags, ingredients
+        self.assert_list_queries(6)
+
+    def test_cached_list_queries(self):
+        # versions, count, recipes, authors, tags, ingredients
+        self.assert_list_queries(6)
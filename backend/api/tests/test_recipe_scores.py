@@ -0,0 +1,42 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.constants import SCORE_COMMIT_MARGIN
+from recipes.models import Favorite, Recipe
+
+
+class UpdateRecipeScoresTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        author = create_user('author')
+        tags, ingredients = create_catalogue()
+        cls.old, cls.new = create_recipes(author, 2, tags, ingredients)
+
+    def favorite(self, recipe, age):
+        Favorite.objects.filter(
+            pk=Favorite.objects.create(user=self.reader, recipe=recipe).pk
+        ).update(created=timezone.now() - age)
+
+    def scored(self):
+        return set(
+            Recipe.objects.filter(popularity__gt=0).values_list(
+                'pk', flat=True
+            )
+        )
+
+    def test_recent_favorites_wait_for_the_next_run(self):
+        self.favorite(self.old, SCORE_COMMIT_MARGIN * 2)
+        self.favorite(self.new, timedelta(0))
+        call_command('update_recipe_scores', verbosity=0)
+        self.assertEqual(self.scored(), {self.old.pk})
+        later = timezone.now() + SCORE_COMMIT_MARGIN * 2
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            call_command('update_recipe_scores', verbosity=0)
+        self.assertEqual(self.scored(), {self.old.pk, self.new.pk})
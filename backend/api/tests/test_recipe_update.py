@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import ShoppingCart, ShoppingCartIngredient
+
+
+class RecipeUpdateTest(APITestCase):
+    """An edit writes only rows of ingredients and tags it changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tags, cls.ingredients = create_catalogue()
+        cls.recipe = create_recipes(
+            cls.author, 1, cls.tags, cls.ingredients
+        )[0]
+        ShoppingCart.objects.create(user=cls.author, recipe=cls.recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.author)
+        self.items = list(self.recipe.recipe_ingredients.order_by('pk'))
+        self.data = {
+            'ingredients': [
+                {'id': item.ingredient_id, 'amount': item.amount}
+                for item in self.items
+            ],
+            'tags': list(self.recipe.tags.values_list('pk', flat=True)),
+            'text': 'Новое описание',
+        }
+
+    def update(self, queries, **data):
+        with self.assertNumQueries(queries):
+            response = self.client.patch(
+                reverse('recipes-detail', args=(self.recipe.pk,)),
+                {**self.data, **data}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_text_only(self):
+        # recipe, author, tags, ingredients, an ingredient and a tag
+        # per validated id, savepoint, current tags, recipe, version,
+        # release, then tags and ingredients of the answer
+        self.update(18)
+        self.assertEqual(
+            list(self.recipe.recipe_ingredients.order_by('pk')), self.items
+        )
+
+    def test_ingredients_difference(self):
+        changed, kept, removed = self.items
+        added = self.ingredients[-1]
+        # removal: rows, delete, carts, totals update and cleanup,
+        # version; amounts update; insert; carts, totals insert,
+        # update and cleanup
+        self.update(30, ingredients=[
+            {'id': changed.ingredient_id, 'amount': 50},
+            {'id': kept.ingredient_id, 'amount': kept.amount},
+            {'id': added.pk, 'amount': 3},
+        ])
+        rows = {
+            item.ingredient_id: (item.pk, item.amount)
+            for item in self.recipe.recipe_ingredients.all()
+        }
+        self.assertEqual(
+            set(rows), {changed.ingredient_id, kept.ingredient_id, added.pk}
+        )
+        self.assertEqual(rows[changed.ingredient_id], (changed.pk, 50))
+        self.assertEqual(rows[kept.ingredient_id], (kept.pk, kept.amount))
+        self.assertEqual(rows[added.pk][1], 3)
+        self.assertEqual(
+            dict(ShoppingCartIngredient.objects.values_list(
+                'ingredient_id', 'amount'
+            )),
+            {changed.ingredient_id: 50, kept.ingredient_id: kept.amount,
+             added.pk: 3}
+        )
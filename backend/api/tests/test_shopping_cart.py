@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import (
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartIngredient
+)
+
+
+class ShoppingCartTotalsTest(APITestCase):
+    """Totals stay equal to the full join after every write path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        cls.other = create_user('other')
+        cls.tags, cls.ingredients = create_catalogue()
+        cls.recipes = create_recipes(
+            cls.other, 4, cls.tags, cls.ingredients
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def assert_totals(self):
+        self.assertEqual(
+            {
+                (total.user_id, total.ingredient_id): total.amount
+                for total in ShoppingCartIngredient.objects.all()
+            },
+            {
+                (row['user_id'], row['ingredient_id']): row['total']
+                for row in ShoppingCartIngredient.objects.live()
+            }
+        )
+
+    def test_model_writes(self):
+        first, second = self.recipes[:2]
+        cart = ShoppingCart.objects.create(user=self.user, recipe=first)
+        ShoppingCart.objects.create(user=self.other, recipe=first)
+        ShoppingCart.objects.create(user=self.user, recipe=second)
+        self.assert_totals()
+        item = first.recipe_ingredients.first()
+        item.amount += 5
+        item.save()
+        self.assert_totals()
+        item.ingredient = self.ingredients[-1]
+        item.save()
+        self.assert_totals()
+        RecipeIngredient.objects.create(
+            recipe=first, ingredient=self.ingredients[-2], amount=7
+        )
+        self.assert_totals()
+        item.delete()
+        second.recipe_ingredients.all().delete()
+        self.assert_totals()
+        cart.recipe = self.recipes[2]
+        cart.save()
+        self.assert_totals()
+        ShoppingCart.objects.filter(user=self.other).delete()
+        self.assertFalse(
+            ShoppingCartIngredient.objects.filter(user=self.other).exists()
+        )
+        self.recipes[2].delete()
+        self.assert_totals()
+
+    def test_api_writes(self):
+        for recipe in self.recipes[:3]:
+            self.client.post(
+                reverse('recipes-shopping-cart', args=(recipe.pk,))
+            )
+        self.client.delete(
+            reverse('recipes-shopping-cart', args=(self.recipes[0].pk,))
+        )
+        self.assert_totals()
+        self.client.post(
+            reverse('recipes-shopping-cart-bulk'),
+            {'recipes': [recipe.pk for recipe in self.recipes]},
+            format='json'
+        )
+        self.assert_totals()
+        self.client.delete(
+            reverse('recipes-shopping-cart-bulk'),
+            {'recipes': [recipe.pk for recipe in self.recipes[1:3]]},
+            format='json'
+        )
+        self.assert_totals()
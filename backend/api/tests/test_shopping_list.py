@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import ShoppingCart
+
+
+class ShoppingListDownloadTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        tags, ingredients = create_catalogue()
+        for recipe in create_recipes(cls.user, 2, tags, ingredients):
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def download(self, format):
+        response = self.client.get(
+            reverse('recipes-download-shopping-cart'), {'format': format}
+        )
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_formats(self):
+        self.assertIn('Ингредиент 0 (г): 1', self.download('txt').decode())
+        self.assertIn(
+            'Ингредиент 0,г,1', self.download('csv').decode('utf-8-sig')
+        )
+        pdf = self.download('pdf')
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertTrue(pdf.rstrip().endswith(b'%%EOF'))
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_user
+from users.models import Subscription
+
+
+class SubscribeTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.author = create_user('author')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def subscribe(self, id):
+        return self.client.post(reverse('users-subscribe', args=(id,)))
+
+    def test_self_subscription_is_rejected(self):
+        for id in (self.user.pk, f'0{self.user.pk}'):
+            with self.subTest(id=id):
+                self.assertEqual(self.subscribe(id).status_code, 400)
+        self.assertFalse(Subscription.objects.exists())
+
+    def test_subscribe(self):
+        self.assertEqual(self.subscribe(self.author.pk).status_code, 201)
+        self.assertEqual(self.subscribe(self.author.pk).status_code, 400)
+        self.assertEqual(self.subscribe(10 ** 6).status_code, 404)
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import Recipe, Tag
+from recipes.search import tag_index
+
+
+class TagFilterTest(APITestCase):
+    """Tags created without signals are filtered by at once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags, ingredients = create_catalogue()
+        cls.recipes = create_recipes(
+            create_user('author'), 3, cls.tags, ingredients
+        )
+
+    def setUp(self):
+        cache.clear()
+        tag_index.invalidate()
+
+    def filter_by(self, *slugs):
+        return self.client.get(reverse('recipes-list'), {'tags': slugs})
+
+    def test_imported_tag(self):
+        self.assertEqual(self.filter_by('tag0').status_code, 200)
+        tag, = Tag.objects.bulk_create([Tag(name='Новый', slug='new')])
+        Recipe.tags.through.objects.create(
+            recipe=self.recipes[1], tag=tag
+        )
+        response = self.filter_by('new')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipes[1].pk]
+        )
+
+    def test_unknown_tag(self):
+        self.assertEqual(self.filter_by('tag0', 'missing').status_code, 400)
@@ -0,0 +1,128 @@
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from api.tasks import process_image_field
+from api.tests.utils import create_catalogue, create_recipes, create_user
+from recipes.models import Recipe
+from taskqueue.constants import TASK_FAILED, TASK_PENDING, TASK_RUNNING
+from taskqueue.models import Task
+from taskqueue.registry import fail, run
+from users.constants import IMAGE_FAILED, IMAGE_PENDING, IMAGE_READY
+
+
+class ImageTaskFailureTest(TestCase):
+    """An image is marked failed whenever its task gives up."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        tags, ingredients = create_catalogue()
+        cls.recipe = create_recipes(author, 1, tags, ingredients)[0]
+        Recipe.objects.filter(pk=cls.recipe.pk).update(
+            image_status=IMAGE_PENDING
+        )
+
+    def create_task(self, attempts, **fields):
+        return Task.objects.create(
+            name=process_image_field.task_name, attempts=attempts,
+            payload={
+                'model': 'recipes.Recipe', 'pk': self.recipe.pk,
+                'field': 'image', 'name': self.recipe.image.name,
+                'sizes': [320],
+            },
+            **fields
+        )
+
+    def image_status(self):
+        return Recipe.objects.values_list(
+            'image_status', flat=True
+        ).get(pk=self.recipe.pk)
+
+    @mock.patch.object(
+        Recipe._meta.get_field('image').storage, 'open',
+        side_effect=RuntimeError
+    )
+    def test_unexpected_error(self, storage_open):
+        with self.assertLogs('taskqueue.registry', 'ERROR'):
+            queued = run(self.create_task(1))
+        self.assertEqual(queued.status, TASK_PENDING)
+        self.assertEqual(self.image_status(), IMAGE_PENDING)
+        with self.assertLogs('taskqueue.registry', 'ERROR'):
+            queued = run(self.create_task(settings.TASK_MAX_ATTEMPTS))
+        self.assertEqual(queued.status, TASK_FAILED)
+        self.assertEqual(self.image_status(), IMAGE_FAILED)
+
+    def test_stale_tasks(self):
+        started = timezone.now() - timedelta(
+            seconds=settings.TASK_TIMEOUT + 1
+        )
+        retried = self.create_task(1, status=TASK_RUNNING, started=started)
+        exhausted = self.create_task(
+            settings.TASK_MAX_ATTEMPTS, status=TASK_RUNNING, started=started
+        )
+        for failed in Task.objects.requeue_stale():
+            fail(failed)
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retried.status, TASK_PENDING)
+        self.assertEqual(exhausted.status, TASK_FAILED)
+        self.assertEqual(self.image_status(), IMAGE_FAILED)
+
+
+class ImageTaskCacheTest(APITestCase):
+    """A processed image is served at once by every process."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        tags, ingredients = create_catalogue()
+        cls.recipe = create_recipes(author, 1, tags, ingredients)[0]
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), 'red').save(buffer, 'PNG')
+        self.upload = Recipe._meta.get_field('image').storage.save(
+            'recipe_images/upload.png', ContentFile(buffer.getvalue())
+        )
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image=self.upload, image_status=IMAGE_PENDING
+        )
+
+    def test_image_ready_after_task(self):
+        url = reverse('recipes-detail', args=[self.recipe.pk])
+        pending = self.client.get(url)
+        self.assertEqual(pending.data['image_status'], IMAGE_PENDING)
+        # The worker has a cache of its own, as with LocMemCache.
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'worker',
+        }}):
+            queued = run(Task.objects.create(
+                name=process_image_field.task_name, payload={
+                    'model': 'recipes.Recipe', 'pk': self.recipe.pk,
+                    'field': 'image', 'name': self.upload, 'sizes': [320],
+                }
+            ))
+        self.assertNotEqual(queued.status, TASK_FAILED)
+        ready = self.client.get(url, HTTP_IF_NONE_MATCH=pending['ETag'])
+        self.assertEqual(ready.status_code, 200)
+        self.assertEqual(ready.data['image_status'], IMAGE_READY)
+        self.assertNotIn(self.upload, ready.data['image'])
+        self.assertIsNotNone(ready.data['image_thumbnail'])
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+INGREDIENTS_PER_RECIPE = 3
+
+
+def create_user(name):
+    return User.objects.create_user(
+        email=f'{name}@example.com', username=name,
+        first_name='Имя', last_name='Фамилия', password='Pa55word!x'
+    )
+
+
+def create_catalogue():
+    """Tags and ingredients recipes are built from."""
+    tags = Tag.objects.bulk_create(
+        Tag(name=f'Тег {number}', slug=f'tag{number}') for number in range(3)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+        for number in range(10)
+    )
+    return tags, ingredients
+
+
+def create_recipes(author, count, tags, ingredients):
+    """
+    Creates recipes with tags and ingredients in bulk. Images are
+    only names, nothing is written to the storage.
+    """
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            author=author, name=f'Рецепт {number}', text='Описание',
+            cooking_time=10, image='recipe_images/test.png',
+            short_link=f'test{author.pk}x{number}'
+        )
+        for number in range(count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tags[number % len(tags)])
+        for number, recipe in enumerate(recipes)
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient=ingredients[(number + shift) % len(ingredients)],
+            amount=shift + 1
+        )
+        for number, recipe in enumerate(recipes)
+        for shift in range(INGREDIENTS_PER_RECIPE)
+    )
+    return recipes
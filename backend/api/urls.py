@@ -1,7 +1,13 @@
 from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from api.views import (
+    IngredientViewSet,
+    RecipeViewSet,
+    TagViewSet,
+    TaskViewSet,
+    UserViewSet
+)
 
 router = DefaultRouter()
 
@@ -25,6 +31,11 @@ router.register(
     IngredientViewSet,
     basename='ingredients'
 )
+router.register(
+    'tasks',
+    TaskViewSet,
+    basename='tasks'
+)
 
 urlpatterns = [
     re_path(r'^auth/', include('djoser.urls.authtoken')),
@@ -1,35 +1,132 @@
+import csv
+import tempfile
 from datetime import datetime as dt
+from functools import cache
+from itertools import chain
+from pathlib import Path
 
-from django.db.models import Sum
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
 
-from recipes.constants import DATETIME_FORMAT
-from recipes.models import Ingredient
+from recipes.constants import (
+    DATETIME_FORMAT,
+    PDF_FONT_SIZE,
+    PDF_MARGIN,
+    SHOPPING_LIST_CHUNK_SIZE
+)
+from recipes.models import ShoppingCartIngredient
 
+SHOPPING_LIST_FOOTER = 'Приятной готовки!'
+CSV_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
 
-def create_shopping_list(user) -> str:
+
+def get_recipes_limit(request):
+    """Valid recipes_limit query parameter or None."""
+    if request is None:
+        return None
+    try:
+        limit = int(request.query_params.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return None
+    return limit if limit >= 0 else None
+
+
+def get_shopping_list_rows(user):
     """
-    Creates shopping list and groups all the ingredients
-    by their names.
+    Reads total amounts of ingredients in user's shopping
+    cart from the materialized totals with a server-side cursor.
     """
-    ingredients = (
-        Ingredient.objects.filter(
-            recipeingredient__recipe__recipes_shoppingcart_related__user=user
+    return (
+        ShoppingCartIngredient.objects.filter(user=user)
+        .values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
         )
-        .annotate(
-            total_amount=Sum('recipeingredient__amount'),
-        )
-        .values('name', 'measurement_unit', 'total_amount')
-        .order_by('name')
+        .order_by('ingredient__name')
+        .iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+    )
+
+
+def get_shopping_list_header(user) -> str:
+    return ("Список покупок пользователя:"
+            f"\n\n{user.get_full_name() or user.username}\n"
+            f"{dt.now().strftime(DATETIME_FORMAT)}\n")
+
+
+def shopping_list_txt(user):
+    """Yields shopping list as plain text line by line."""
+    yield get_shopping_list_header(user)
+    for name, measurement_unit, total_amount in get_shopping_list_rows(user):
+        yield f'\n{name} ({measurement_unit}): {total_amount}'
+    yield f'\n\n\n{SHOPPING_LIST_FOOTER}'
+
+
+class _Echo:
+    """Pseudo-buffer that gives back what csv writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def shopping_list_csv(user):
+    """Yields shopping list as CSV rows, BOM is for Excel."""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(CSV_HEADER)
+    for row in get_shopping_list_rows(user):
+        yield writer.writerow(row)
+
+
+@cache
+def get_pdf_font() -> str:
+    """Registers a font with cyrillic glyphs if it is available."""
+    if not Path(settings.SHOPPING_LIST_PDF_FONT).exists():
+        return 'Helvetica'
+    pdfmetrics.registerFont(
+        TTFont('ShoppingListFont', settings.SHOPPING_LIST_PDF_FONT)
     )
-    shopping_list = [
-        f'{ing["name"]} ({ing["measurement_unit"]}): {ing["total_amount"]}'
-        for ing in ingredients
-    ]
-    shopping_list.insert(
-        0,
-        ("Список покупок пользователя:"
-         f"\n\n{user.get_full_name() or user.username}\n"
-         f"{dt.now().strftime(DATETIME_FORMAT)}\n")
+    return 'ShoppingListFont'
+
+
+def shopping_list_pdf(user):
+    """
+    Draws shopping list page by page while rows are read. Unlike
+    txt and csv the PDF is buffered: reportlab keeps pages in
+    memory until save, then the document goes to a temporary file
+    and only after that is yielded in chunks. Big carts are better
+    exported by the render_shopping_list task.
+    """
+    font = get_pdf_font()
+    width, height = A4
+    leading = PDF_FONT_SIZE * 1.5
+    lines = chain(
+        get_shopping_list_header(user).splitlines(),
+        (
+            f'{name} ({measurement_unit}): {total_amount}'
+            for name, measurement_unit, total_amount
+            in get_shopping_list_rows(user)
+        ),
+        ('', SHOPPING_LIST_FOOTER),
     )
-    shopping_list.append("\n\nПриятной готовки!")
-    return ('\n'.join(shopping_list))
+    with tempfile.TemporaryFile() as buffer:
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        top = height - PDF_MARGIN
+        y = top
+        for line in lines:
+            if y < PDF_MARGIN:
+                pdf.showPage()
+                y = top
+            pdf.setFont(font, PDF_FONT_SIZE)
+            pdf.drawString(PDF_MARGIN, y, line)
+            y -= leading
+        pdf.save()
+        buffer.seek(0)
+        yield from iter(lambda: buffer.read(SHOPPING_LIST_CHUNK_SIZE), b'')
+
+
+SHOPPING_LIST_WRITERS = {
+    'txt': shopping_list_txt,
+    'csv': shopping_list_csv,
+    'pdf': shopping_list_pdf,
+}
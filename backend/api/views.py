@@ -1,28 +1,69 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
-from rest_framework import permissions, status, viewsets
+from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
-from api.filters import IngredientFilter, RecipeFilter
-from api.paginators import PageLimitPagination
+from api.cache import serialize_recipes
+from api.conditional import ingredients_condition, versions_condition
+from api.filters import RecipeFilter
+from api.images import delete_thumbnails
+from api.links import delete_link, delete_links, insert_link, insert_links
+from api.paginators import (
+    FeedKeysetPagination,
+    RecipePagination,
+    UserPagination
+)
 from api.permissions import IsOwnerOrReadOnly
+from api.renderers import (
+    CSVRenderer,
+    FormatContentNegotiation,
+    PDFRenderer,
+    TextRenderer
+)
 from api.serializers import (
     AvatarForUserSerializer,
     IngredientSerializer,
     RecipeCreateUpdateSerializer,
+    RecipeIdsSerializer,
     RecipeMinifiedSerializer,
     RecipeReadSerializer,
+    ShoppingCartIngredientSerializer,
+    ShoppingListExportSerializer,
     SubscriptionUserSerializer,
     TagSerializer,
+    TaskSerializer,
     UserSerializer
 )
-from api.utils import create_shopping_list
-from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from api.tasks import render_shopping_list
+from api.utils import SHOPPING_LIST_WRITERS, get_recipes_limit
+from recipes.constants import (
+    FAVORITES_VERSION,
+    RECIPES_VERSION,
+    TAGS_VERSION,
+    USER_VERSION
+)
+from recipes.models import (
+    DataVersion,
+    Favorite,
+    FeedItem,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    ShoppingCartIngredient,
+    Tag
+)
+from recipes.search import ingredient_index
+from recipes.signals import move_counter
+from taskqueue.models import Task
+from taskqueue.registry import enqueue
+from users.constants import AVATAR_THUMBNAIL_SIZES
 from users.models import Subscription
 
 User = get_user_model()
@@ -31,9 +72,12 @@ User = get_user_model()
 class UserViewSet(DjoserUserViewSet):
     """Viewset for all users endpoints."""
 
-    queryset = User.objects.prefetch_related('subscriptions')
+    queryset = User.objects.order_by('id')
     serializer_class = UserSerializer
-    pagination_class = PageLimitPagination
+    pagination_class = UserPagination
+
+    def get_queryset(self):
+        return super().get_queryset().with_is_subscribed(self.request.user)
 
     def get_permissions(self):
         """Allows to create and look up accounts for anonymous users."""
@@ -67,57 +111,53 @@ class UserViewSet(DjoserUserViewSet):
             serializer.is_valid(raise_exception=True)
             user = serializer.save()
             return Response(
-                {'avatar': user.avatar.url}, status=status.HTTP_200_OK
+                {
+                    'avatar': user.avatar.url,
+                    'avatar_status': user.avatar_status,
+                },
+                status=status.HTTP_200_OK
             )
+        if request.user.avatar:
+            delete_thumbnails(request.user.avatar, AVATAR_THUMBNAIL_SIZES)
         request.user.avatar.delete()
         request.user.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def get_user_for_subscription(self, id):
-        try:
-            target_user = get_object_or_404(User, pk=id)
-        except NotFound:
-            return Response(
-                {"detail": "Такого пользователя не существует."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        return target_user
-
     @action(
         detail=True,
         methods=['post'],
     )
     def subscribe(self, request, id=None):
-        target_user = self.get_user_for_subscription(id)
-        if request.user == target_user:
+        # Compared as numbers, "007" is the same user as "7".
+        try:
+            id = int(id)
+        except ValueError:
+            raise Http404
+        if request.user.id == id:
             return Response(
                 {"error": "Нельзя подписаться на самого себя."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        _, created = Subscription.objects.get_or_create(
-            user=request.user, subscription=target_user
-        )
-        serializer = SubscriptionUserSerializer(
-            target_user,
-            context={'request': request}
-        )
-        return (
-            Response(
-                serializer.data, status=status.HTTP_201_CREATED
-            ) if created else Response(
+        if not insert_link(
+            Subscription, user_id=request.user.id, subscription_id=id
+        ):
+            get_object_or_404(User, pk=id)
+            return Response(
                 {"error": "Вы уже подписаны."},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        serializer = SubscriptionUserSerializer(
+            User.objects.with_is_subscribed(request.user).get(pk=id),
+            context={'request': request}
         )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
     def unsubscribe(self, request, id=None):
-        target_user = self.get_user_for_subscription(id)
-        deleted, _ = Subscription.objects.filter(
-            user=request.user,
-            subscription=target_user
-        ).delete()
-        if not deleted:
+        if not delete_link(
+            Subscription, user_id=request.user.id, subscription_id=id
+        ):
+            get_object_or_404(User, pk=id)
             return Response(
                 {"error": "Такой подписки не существует."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -129,9 +169,17 @@ class UserViewSet(DjoserUserViewSet):
         methods=['get'],
     )
     def subscriptions(self, request):
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_status', 'cooking_time', 'author_id'
+        )
+        limit = get_recipes_limit(request)
+        if limit is not None:
+            recipes = recipes[:limit]
         subscribed_users = User.objects.filter(
             subscriptions__user=request.user
-        ).prefetch_related('recipes')
+        ).with_is_subscribed(request.user).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='shown_recipes')
+        ).order_by('id')
         page = self.paginate_queryset(subscribed_users)
         serializer = SubscriptionUserSerializer(
             page, many=True, context={'request': request}
@@ -145,7 +193,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsOwnerOrReadOnly, )
-    pagination_class = PageLimitPagination
+    pagination_class = RecipePagination
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -153,11 +201,55 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return RecipeReadSerializer
 
     def get_queryset(self):
-        return Recipe.objects.with_favorites_and_cart(
-            self.request.user
-        ).select_related(
-            'author'
-        ).prefetch_related('tags', 'ingredients')
+        if settings.RECIPE_CACHE and self.action in (
+            'list', 'retrieve', 'feed'
+        ):
+            return Recipe.objects.for_cached_read(self.request.user)
+        return Recipe.objects.for_read(self.request.user)
+
+    def serialize_recipes(self, recipes):
+        if settings.RECIPE_CACHE:
+            return serialize_recipes(recipes, self.request)
+        return self.get_serializer(recipes, many=True).data
+
+    @versions_condition(RECIPES_VERSION, FAVORITES_VERSION, per_user=True)
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_CACHE:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        return self.get_paginated_response(serialize_recipes(page, request))
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(permissions.IsAuthenticated,),
+        pagination_class=FeedKeysetPagination
+    )
+    def feed(self, request):
+        """
+        Newest recipes of followed authors, a page is read
+        from the user's feed index and then by primary keys.
+        """
+        page = self.paginate_queryset(
+            FeedItem.objects.filter(user=request.user)
+            .order_by('-pub_date', '-recipe_id')
+            .only('recipe_id', 'pub_date')
+        )
+        recipes = self.get_queryset().in_bulk(
+            [item.recipe_id for item in page]
+        )
+        return self.get_paginated_response(self.serialize_recipes([
+            recipes[item.recipe_id] for item in page
+            if item.recipe_id in recipes
+        ]))
+
+    @versions_condition(RECIPES_VERSION, FAVORITES_VERSION, per_user=True)
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.RECIPE_CACHE:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(serialize_recipes([self.get_object()], request)[0])
 
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_link(self, request, pk=None):
@@ -167,28 +259,62 @@ class RecipeViewSet(viewsets.ModelViewSet):
         })
 
     def favorite_shopping_cart_add(self, request, model, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        _, created = model.objects.get_or_create(
-            recipe=recipe,
-            user=request.user
-        )
+        if not insert_link(model, user_id=request.user.id, recipe_id=pk):
+            get_object_or_404(Recipe, pk=pk)
+            return Response(status=status.HTTP_400_BAD_REQUEST)
         serializer = RecipeMinifiedSerializer(
-            recipe, context={'request': request}
+            Recipe.objects.only(
+                'id', 'name', 'image', 'image_status', 'cooking_time'
+            ).get(pk=pk),
+            context={'request': request}
         )
-        if not created:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
     def favorite_shopping_cart_delete(self, model, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        deleted, _ = model.objects.filter(
-            user=self.request.user,
-            recipe=recipe
-        ).delete()
-        if not deleted:
+        if not delete_link(
+            model, user_id=self.request.user.id, recipe_id=pk
+        ):
+            get_object_or_404(Recipe, pk=pk)
             return Response(status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def favorite_shopping_cart_bulk(self, request, model):
+        """
+        Adds (POST) or removes (DELETE) many recipes at once with
+        a single INSERT or DELETE ... RETURNING, so recipes changed
+        by a concurrent request are not reported twice. No signals
+        are sent. Returns ids of changed recipes and a response
+        with a status for every requested id.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['recipes']
+        if request.method == 'POST':
+            changed = insert_links(
+                model, 'recipe', ids, user_id=request.user.id
+            )
+            done, skipped = 'added', 'exists'
+        else:
+            changed = delete_links(
+                model, 'recipe', ids, user_id=request.user.id
+            )
+            done, skipped = 'removed', 'absent'
+        found = set(changed)
+        if len(changed) < len(ids):
+            found.update(Recipe.objects.filter(
+                pk__in=set(ids) - changed
+            ).values_list('pk', flat=True).order_by())
+        return changed, Response({'results': [
+            {
+                'id': pk,
+                'status': (
+                    'not_found' if pk not in found
+                    else done if pk in changed else skipped
+                ),
+            }
+            for pk in ids
+        ]})
+
     @action(
         detail=True,
         methods=['post'],
@@ -205,6 +331,31 @@ class RecipeViewSet(viewsets.ModelViewSet):
             Favorite, pk
         )
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite/bulk',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    @transaction.atomic
+    def favorite_bulk(self, request):
+        """
+        Bulk writes skip signals, so counters and versions
+        of changed favorites are moved here, once per request.
+        """
+        changed, response = self.favorite_shopping_cart_bulk(
+            request, Favorite
+        )
+        if changed:
+            move_counter(
+                Recipe.objects.filter(pk__in=changed), 'favorites_count',
+                1 if request.method == 'POST' else -1
+            )
+            DataVersion.objects.bump(
+                USER_VERSION.format(request.user.id), FAVORITES_VERSION
+            )
+        return response
+
     @action(
         detail=True,
         methods=['post'],
@@ -221,25 +372,95 @@ class RecipeViewSet(viewsets.ModelViewSet):
             ShoppingCart, pk
         )
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart/bulk',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    @transaction.atomic
+    def shopping_cart_bulk(self, request):
+        """
+        Bulk writes skip signals, so totals and versions
+        of changed recipes are moved here, once per request.
+        """
+        changed, response = self.favorite_shopping_cart_bulk(
+            request, ShoppingCart
+        )
+        if changed:
+            ShoppingCartIngredient.objects.add_recipes(
+                (request.user.id,), changed,
+                sign=1 if request.method == 'POST' else -1
+            )
+            DataVersion.objects.bump(USER_VERSION.format(request.user.id))
+        return response
+
     @action(
         detail=False,
         methods=['get'],
+        url_path='shopping_cart/summary',
         permission_classes=(permissions.IsAuthenticated,)
     )
+    def shopping_cart_summary(self, request):
+        """Total amounts of ingredients in user's shopping cart."""
+        totals = ShoppingCartIngredient.objects.filter(
+            user=request.user
+        ).select_related('ingredient').order_by('ingredient__name')
+        return Response(ShoppingCartIngredientSerializer(
+            totals, many=True
+        ).data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=(TextRenderer, CSVRenderer, PDFRenderer),
+        content_negotiation_class=FormatContentNegotiation
+    )
     def download_shopping_cart(self, request):
+        """Streams shopping list as ?format=txt (default), csv or pdf."""
         user = self.request.user
-        shopping_list = create_shopping_list(user)
-        filename = f"{user.username}'s_shopping_list.txt"
-        return HttpResponse(
-            shopping_list, content_type='text/plain; charset=utf-8',
+        renderer = request.accepted_renderer
+        filename = f"{user.username}'s_shopping_list.{renderer.format}"
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        return StreamingHttpResponse(
+            SHOPPING_LIST_WRITERS[renderer.format](user),
+            content_type=content_type,
             headers={
                 "Content-Disposition": (
                     f"attachment; filename*=UTF-8''{filename}"
                 ),
-                "Content-Length": len(shopping_list.encode("utf-8"))
+                "X-Accel-Buffering": "no"
             }
         )
 
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='download_shopping_cart/export',
+        url_name='export-shopping-cart'
+    )
+    def export_shopping_cart(self, request):
+        """
+        Queues rendering of the shopping list to a file, the link
+        appears in /api/tasks/<id>/ when the task is done.
+        """
+        serializer = ShoppingListExportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queued = enqueue(
+            render_shopping_list,
+            user=request.user,
+            user_id=request.user.id,
+            format=serializer.validated_data['format'],
+        )
+        return Response(
+            TaskSerializer(queued, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for tags."""
@@ -247,11 +468,41 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
+    @versions_condition(TAGS_VERSION)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @versions_condition(TAGS_VERSION)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for ingredients."""
 
     serializer_class = IngredientSerializer
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
     queryset = Ingredient.objects.all()
+
+    @ingredients_condition
+    def list(self, request, *args, **kwargs):
+        """
+        Answers from the in-memory index without database queries,
+        the index is the only place where names are matched.
+        """
+        return Response(
+            ingredient_index.search(request.query_params.get('name', ''))
+        )
+
+    @ingredients_condition
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class TaskViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Status of background tasks of the current user."""
+
+    serializer_class = TaskSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        return Task.objects.filter(user=self.request.user)
@@ -25,15 +25,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
     'users',
     'api',
-    'recipes'
+    'recipes',
+    'taskqueue',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -119,7 +122,7 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'PAGE_SIZE': 6,
 }
@@ -135,3 +138,92 @@ DJOSER = {
         'current_user': 'api.serializers.UserSerializer',
     }
 }
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+
+RECIPE_CACHE = os.getenv('RECIPE_CACHE', 'True') == 'True'
+
+RECIPE_CACHE_TIMEOUT = int(os.getenv('RECIPE_CACHE_TIMEOUT', 60))
+
+RECIPE_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_COUNT_CACHE_TIMEOUT', 30)
+)
+
+RECIPE_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv('RECIPE_COUNT_ESTIMATE_THRESHOLD', 100000)
+)
+
+USER_COUNT_CACHE_TIMEOUT = int(os.getenv('USER_COUNT_CACHE_TIMEOUT', 30))
+
+USER_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv('USER_COUNT_ESTIMATE_THRESHOLD', 100000)
+)
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+TAG_INDEX_TTL = int(os.getenv('TAG_INDEX_TTL', 300))
+
+IMAGE_FORMAT = os.getenv('IMAGE_FORMAT', 'WEBP')
+
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 80))
+
+IMAGE_MAX_SIZE = int(os.getenv('IMAGE_MAX_SIZE', 1600))
+
+TASKS_EAGER = os.getenv('TASKS_EAGER') == 'True'
+
+TASK_POLL_INTERVAL = float(os.getenv('TASK_POLL_INTERVAL', 1))
+
+TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', 3))
+
+TASK_RETRY_DELAY = int(os.getenv('TASK_RETRY_DELAY', 10))
+
+TASK_TIMEOUT = int(os.getenv('TASK_TIMEOUT', 600))
+
+TASK_RETENTION = int(os.getenv('TASK_RETENTION', 24 * 60 * 60))
+
+# Dropped tokens must be dropped in every process, so the token
+# cache is turned off unless the cache backend is shared.
+AUTH_TOKEN_CACHE = os.getenv(
+    'AUTH_TOKEN_CACHE', 'False'
+) == 'True' and CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv('AUTH_TOKEN_LOCAL_TTL', 5))
+
+AUTH_TOKEN_LOCAL_SIZE = int(os.getenv('AUTH_TOKEN_LOCAL_SIZE', 1024))
+
+PROFILING = os.getenv('DJANGO_PROFILING') == 'True'
+
+PROFILING_SAMPLE_RATE = float(os.getenv('DJANGO_PROFILING_SAMPLE_RATE', 0.01))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
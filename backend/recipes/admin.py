@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Count
 
 from recipes.constants import EMPTY_VALUE_RU
 from recipes.models import (
@@ -38,15 +37,6 @@ class RecipeAdmin(admin.ModelAdmin):
     empty_value_display = EMPTY_VALUE_RU
     min_num = 1
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            favorites_count=Count('recipes_favorite_related'),
-        )
-
-    @admin.display(description='В избранном')
-    def favorites_count(self, obj):
-        return obj.favorites_count
-
 
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
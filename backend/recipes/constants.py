@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta, timezone
+
 MAX_LENGTH_SHORT = 32
 MAX_LENGTH_LONG = 256
 MAX_LENGTH_TEXT = 8000
@@ -10,3 +12,26 @@ DATETIME_FORMAT = '%d/%m/%Y %H:%M'
 EMPTY_VALUE_RU = 'не задано'
 MAX_POSITIVE_SMALL_INT = 32767
 MIN_AMOUNT_OF_INGREDIENTS = 1
+SEARCH_CONFIG = 'russian'
+RECIPES_VERSION = 'recipes'
+FAVORITES_VERSION = 'favorites'
+TAGS_VERSION = 'tags'
+USER_VERSION = 'user:{}'
+SHOPPING_LIST_CHUNK_SIZE = 2000
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+SCORES_VERSION = 'recipe_scores'
+SCORE_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+POPULAR_HALF_LIFE = 30 * 24 * 60 * 60
+TRENDING_HALF_LIFE = 24 * 60 * 60
+FAVORITE_SCORE_WEIGHT = 1
+SHOPPING_CART_SCORE_WEIGHT = 2
+SCORE_COMMIT_MARGIN = timedelta(minutes=1)
+RECIPE_ORDERINGS = {
+    'popular': ('-popularity', '-id'),
+    'trending': ('-trending', '-id'),
+    'new': ('-pub_date', '-name', '-id'),
+}
+FEED_LENGTH = 500
+MAX_BULK_RECIPES = 100
+RECIPE_THUMBNAIL_SIZES = (320, 640)
@@ -3,10 +3,13 @@ import json
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from recipes.models import DataVersion
+
 
 class BaseImportCommand(BaseCommand):
     model = None
     filename = None
+    versions = ()
 
     def handle(self, *args, **options):
         file_path = settings.BASE_DIR / 'data' / self.filename
@@ -16,3 +19,5 @@ class BaseImportCommand(BaseCommand):
             data = json.load(f)
             objects = [model(**item) for item in data]
             model.objects.bulk_create(objects, ignore_conflicts=True)
+        if self.versions:
+            DataVersion.objects.bump(*self.versions)
@@ -1,3 +1,4 @@
+from recipes.constants import RECIPES_VERSION, TAGS_VERSION
 from recipes.management.commands._base import BaseImportCommand
 from recipes.models import Tag
 
@@ -5,3 +6,4 @@ from recipes.models import Tag
 class Command(BaseImportCommand):
     model = Tag
     filename = 'tags.json'
+    versions = (TAGS_VERSION, RECIPES_VERSION)
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import ShoppingCartIngredient
+
+SHOWN_MISMATCHES = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds materialized totals of shopping carts and '
+        'verifies them against the full join of carts and recipes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only compare totals with the full join.'
+        )
+
+    def mismatches(self):
+        """Yields (user, ingredient, stored, live) for differing totals."""
+        totals = ShoppingCartIngredient.objects
+        live = {
+            (row['user_id'], row['ingredient_id']): row['total']
+            for row in totals.live().iterator()
+        }
+        for user_id, ingredient_id, amount in totals.values_list(
+            'user_id', 'ingredient_id', 'amount'
+        ).iterator():
+            expected = live.pop((user_id, ingredient_id), None)
+            if expected != amount:
+                yield user_id, ingredient_id, amount, expected
+        for (user_id, ingredient_id), expected in live.items():
+            yield user_id, ingredient_id, None, expected
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            with transaction.atomic():
+                ShoppingCartIngredient.objects.rebuild()
+            self.stdout.write('Итоги корзин пересчитаны.')
+        mismatches = list(self.mismatches())
+        for user_id, ingredient_id, amount, expected in (
+            mismatches[:SHOWN_MISMATCHES]
+        ):
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'сохранено {amount}, ожидается {expected}'
+            )
+        if mismatches:
+            raise CommandError(
+                f'Найдено расхождений: {len(mismatches)}.'
+            )
+        self.stdout.write(self.style.SUCCESS('Итоги корзин совпадают.'))
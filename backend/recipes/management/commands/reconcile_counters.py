@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_of(model, field):
+    """Number of rows of model pointing to the outer object by field."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by()
+            .values(field).annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscription, 'subscription'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recounts favorites_count of recipes, recipes_count and '
+        'subscribers_count of users and repairs the drifted ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only report drifted counters.'
+        )
+
+    def handle(self, *args, **options):
+        drifted = 0
+        with transaction.atomic():
+            for model, field, counted, counted_field in COUNTERS:
+                actual = count_of(counted, counted_field)
+                objects = model.objects.annotate(actual=actual).filter(
+                    ~Q(**{field: F('actual')})
+                )
+                if options['verify']:
+                    found = objects.count()
+                else:
+                    found = objects.update(**{field: actual})
+                if found and options['verbosity']:
+                    self.stdout.write(
+                        f'{model._meta.verbose_name_plural}.{field}: '
+                        f'расхождений {found}'
+                    )
+                drifted += found
+        if drifted and options['verify']:
+            raise CommandError(f'Найдено расхождений: {drifted}.')
+        if options['verbosity']:
+            self.stdout.write(self.style.SUCCESS('Счётчики сверены.'))
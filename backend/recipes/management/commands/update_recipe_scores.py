@@ -0,0 +1,109 @@
+import math
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.constants import (
+    FAVORITE_SCORE_WEIGHT,
+    POPULAR_HALF_LIFE,
+    RECIPES_VERSION,
+    SCORE_COMMIT_MARGIN,
+    SCORE_EPOCH,
+    SCORES_VERSION,
+    SHOPPING_CART_SCORE_WEIGHT,
+    SHOPPING_LIST_CHUNK_SIZE,
+    TRENDING_HALF_LIFE
+)
+from recipes.models import DataVersion, Favorite, Recipe, ShoppingCart
+
+SCORES = (
+    ('popularity', POPULAR_HALF_LIFE),
+    ('trending', TRENDING_HALF_LIFE),
+)
+EVENTS = (
+    (Favorite, FAVORITE_SCORE_WEIGHT),
+    (ShoppingCart, SHOPPING_CART_SCORE_WEIGHT),
+)
+
+
+def log2_add(first, second):
+    """log2(2 ** first + 2 ** second) without overflowing."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+class Command(BaseCommand):
+    help = (
+        'Adds favorites and shopping cart additions made since the '
+        'previous run to exponentially decayed popularity and '
+        'trending scores of recipes, meant to be run periodically.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute scores of all recipes from scratch.'
+        )
+
+    def collect(self, since, until):
+        """
+        Sums decayed weights of events per recipe. Scores are
+        stored as log2 of the sum scaled to SCORE_EPOCH, so old
+        scores need no decaying: ordering by them equals ordering
+        by the sum decayed to any moment.
+        """
+        scores = defaultdict(lambda: dict.fromkeys(
+            (field for field, _ in SCORES), -math.inf
+        ))
+        for model, weight in EVENTS:
+            events = model.objects.filter(created__lte=until)
+            if since:
+                events = events.filter(created__gt=since)
+            for recipe_id, created in events.values_list(
+                'recipe_id', 'created'
+            ).iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE):
+                age = (created - SCORE_EPOCH).total_seconds()
+                recipe_scores = scores[recipe_id]
+                for field, half_life in SCORES:
+                    recipe_scores[field] = log2_add(
+                        recipe_scores[field],
+                        math.log2(weight) + age / half_life
+                    )
+        return scores
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        # Events are stamped before their transactions commit, so
+        # the newest ones are left to the next run: a favorite
+        # committed after the watermark passed it would be lost.
+        until = timezone.now() - SCORE_COMMIT_MARGIN
+        since = None
+        if not options['full']:
+            since = DataVersion.objects.filter(
+                name=SCORES_VERSION
+            ).values_list('modified', flat=True).first()
+        scores = self.collect(since, until)
+        fields = [field for field, _ in SCORES]
+        if options['full']:
+            Recipe.objects.update(**dict.fromkeys(fields, 0))
+        recipes = list(
+            Recipe.objects.filter(pk__in=scores).only('pk', *fields)
+        )
+        for recipe in recipes:
+            for field in fields:
+                setattr(recipe, field, log2_add(
+                    getattr(recipe, field), scores[recipe.pk][field]
+                ))
+        Recipe.objects.bulk_update(
+            recipes, fields, batch_size=SHOPPING_LIST_CHUNK_SIZE
+        )
+        DataVersion.objects.bump(SCORES_VERSION, RECIPES_VERSION)
+        DataVersion.objects.filter(name=SCORES_VERSION).update(
+            modified=until
+        )
+        if options['verbosity']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Обновлены оценки рецептов: {len(recipes)}.'
+            ))
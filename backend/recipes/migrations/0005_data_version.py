@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-17 05:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='название')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='версия')),
+                ('modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='дата изменения')),
+            ],
+            options={
+                'verbose_name': 'версия данных',
+                'verbose_name_plural': 'версии данных',
+            },
+        ),
+    ]
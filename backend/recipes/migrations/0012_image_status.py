@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-17 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(choices=[('ready', 'обработано'), ('pending', 'обрабатывается'), ('failed', 'ошибка обработки')], default='ready', editable=False, max_length=16, verbose_name='статус изображения'),
+        ),
+    ]
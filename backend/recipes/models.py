@@ -1,14 +1,30 @@
 import shortuuid
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import (
     MaxLengthValidator,
     MaxValueValidator,
     MinValueValidator
 )
-from django.db import models
-from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.db import connection, models
+from django.db.models import (
+    BooleanField,
+    Case,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When
+)
+from django.utils import timezone
 
 from recipes.constants import (
+    FEED_LENGTH,
     MAX_LENGTH_INGREDIENT,
     MAX_LENGTH_LONG,
     MAX_LENGTH_MEASURE,
@@ -18,8 +34,16 @@ from recipes.constants import (
     MAX_POSITIVE_SMALL_INT,
     MIN_AMOUNT_OF_INGREDIENTS,
     MIN_COOKING_TIME,
+    SEARCH_CONFIG,
+    SHOPPING_LIST_CHUNK_SIZE,
     SHORT_LINK_LENGTH
 )
+from users.constants import (
+    IMAGE_READY,
+    IMAGE_STATUSES,
+    MAX_LENGTH_IMAGE_STATUS
+)
+from users.models import CountersMixin, Subscription
 
 User = get_user_model()
 
@@ -82,8 +106,9 @@ class Tag(models.Model):
 
 class RecipeQuerySet(models.query.QuerySet):
     """
-    Helps by adding a method for fetching recipes with
-    annotated is_favorited and is_in_shopping_cart fields,
+    Helps by adding methods for fetching recipes with
+    annotated is_favorited and is_in_shopping_cart fields
+    and with everything needed for reading them,
     expects user as an argument.
     """
 
@@ -108,11 +133,77 @@ class RecipeQuerySet(models.query.QuerySet):
             is_in_shopping_cart=Value(False, output_field=BooleanField())
         )
 
+    def for_read(self, user):
+        """
+        Fetches recipes with annotated flags, authors with
+        is_subscribed, tags and ingredients in a fixed
+        number of queries whatever the number of recipes.
+        """
+        return self.with_favorites_and_cart(user).defer(
+            'search_vector'
+        ).prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.with_is_subscribed(user)
+            ),
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+
+    def for_cached_read(self, user):
+        """
+        Fetches recipes with only per-user flags annotated,
+        everything else is taken from cached representations.
+        """
+        recipes = self.with_favorites_and_cart(user).defer('search_vector')
+        if user.is_authenticated:
+            return recipes.annotate(
+                author_is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        user=user,
+                        subscription=OuterRef('author')
+                    )
+                )
+            )
+        return recipes.annotate(
+            author_is_subscribed=Value(False, output_field=BooleanField())
+        )
+
+    def update_search_vector(self):
+        """
+        Rebuilds stored full-text vectors from name, text and
+        names of ingredients, works only on PostgreSQL.
+        """
+        if connection.vendor != 'postgresql':
+            return 0
+        ingredient_names = RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk')
+        ).values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+        return self.update(
+            search_vector=(
+                SearchVector('name', weight='A', config=SEARCH_CONFIG)
+                + SearchVector(
+                    Subquery(ingredient_names),
+                    weight='B',
+                    config=SEARCH_CONFIG
+                )
+                + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+            )
+        )
+
 
-class Recipe(models.Model):
+class Recipe(CountersMixin, models.Model):
     """Model for recipes, all fields are required."""
 
     objects = RecipeQuerySet.as_manager()
+    counter_fields = ('favorites_count', 'popularity', 'trending')
     author = models.ForeignKey(
         User,
         verbose_name='автор рецепта',
@@ -128,6 +219,13 @@ class Recipe(models.Model):
         verbose_name='изображение блюда',
         upload_to='recipe_images',
     )
+    image_status = models.CharField(
+        verbose_name='статус изображения',
+        max_length=MAX_LENGTH_IMAGE_STATUS,
+        choices=IMAGE_STATUSES,
+        default=IMAGE_READY,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='описание рецепта',
         validators=[MaxLengthValidator(MAX_LENGTH_TEXT)],
@@ -165,11 +263,49 @@ class Recipe(models.Model):
         verbose_name='дата публикации',
         auto_now_add=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='в избранном',
+        default=0,
+        editable=False,
+    )
+    popularity = models.FloatField(
+        verbose_name='популярность',
+        default=0,
+        editable=False,
+    )
+    trending = models.FloatField(
+        verbose_name='рейтинг в трендах',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='поисковый вектор',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('pub_date', 'name',)
         verbose_name = 'рецепт'
         verbose_name_plural = 'рецепты'
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'name', 'id'],
+                name='recipe_pub_date_name_id_idx'
+            ),
+            models.Index(
+                fields=['-popularity', '-id'],
+                name='recipe_popularity_id_idx'
+            ),
+            models.Index(
+                fields=['-trending', '-id'],
+                name='recipe_trending_id_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'name'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name[:MAX_LENGTH_STR]
@@ -238,6 +374,11 @@ class ShopFavorite(models.Model):
         verbose_name='пользователь',
         related_name='%(app_label)s_%(model_name)s_related'
     )
+    created = models.DateTimeField(
+        verbose_name='дата добавления',
+        default=timezone.now,
+        db_index=True,
+    )
 
     class Meta:
         abstract = True
@@ -247,6 +388,12 @@ class ShopFavorite(models.Model):
                 name='unique_%(app_label)s_%(class)s'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('user', 'recipe'),
+                name='%(app_label)s_%(class)s_user_idx'
+            ),
+        ]
 
 
 class Favorite(ShopFavorite):
@@ -262,3 +409,279 @@ class ShoppingCart(ShopFavorite):
 
     def __str__(self):
         return f'Корзина пользователя {self.user.username}'
+
+
+class ShoppingCartIngredientQuerySet(models.query.QuerySet):
+    """
+    Helps by adding methods for keeping per-user totals of
+    ingredients in shopping carts up to date.
+    """
+
+    def add_amounts(self, user_ids, amounts):
+        """
+        Adds amounts, a dict of ingredient ids to amounts
+        (negative to subtract), to totals of given users
+        with a fixed number of queries, concurrent changes
+        of the same rows are summed by the database.
+        """
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items() if amount
+        }
+        if not amounts:
+            return
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        self.bulk_create(
+            (
+                ShoppingCartIngredient(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=0
+                )
+                for user_id in user_ids
+                for ingredient_id, amount in amounts.items() if amount > 0
+            ),
+            ignore_conflicts=True
+        )
+        totals = self.filter(
+            user_id__in=user_ids, ingredient_id__in=amounts
+        )
+        totals.update(amount=F('amount') + Case(
+            *(
+                When(ingredient_id=ingredient_id, then=Value(amount))
+                for ingredient_id, amount in amounts.items()
+            ),
+            default=Value(0)
+        ))
+        totals.filter(amount__lte=0).delete()
+
+    def add_recipes(self, user_ids, recipe_ids, sign=1):
+        """Adds (or subtracts with sign=-1) ingredients of recipes."""
+        self.add_amounts(user_ids, {
+            ingredient_id: sign * amount
+            for ingredient_id, amount in RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids
+            ).values('ingredient_id').annotate(
+                total=Sum('amount')
+            ).values_list('ingredient_id', 'total').order_by()
+        })
+
+    def add_recipe(self, user_ids, recipe_id, sign=1):
+        """Adds (or subtracts with sign=-1) ingredients of a recipe."""
+        self.add_recipes(user_ids, (recipe_id,), sign)
+
+    def live(self):
+        """Totals computed from shopping carts by the full join."""
+        return RecipeIngredient.objects.filter(
+            recipe__recipes_shoppingcart_related__isnull=False
+        ).values(
+            'ingredient_id',
+            user_id=F('recipe__recipes_shoppingcart_related__user_id')
+        ).annotate(total=Sum('amount')).order_by()
+
+    def rebuild(self):
+        """Replaces all the totals with ones computed by the full join."""
+        self.all().delete()
+        self.bulk_create(
+            (
+                ShoppingCartIngredient(
+                    user_id=row['user_id'],
+                    ingredient_id=row['ingredient_id'],
+                    amount=row['total']
+                )
+                for row in self.live().iterator()
+            ),
+            batch_size=SHOPPING_LIST_CHUNK_SIZE
+        )
+
+
+class ShoppingCartIngredient(models.Model):
+    """
+    Materialized total amount of an ingredient in all
+    recipes of user's shopping cart.
+    """
+
+    objects = ShoppingCartIngredientQuerySet.as_manager()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='пользователь',
+        related_name='shopping_cart_ingredients'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='ингредиент',
+    )
+    amount = models.IntegerField(
+        verbose_name='общее количество',
+    )
+
+    class Meta:
+        verbose_name = 'ингредиент корзины'
+        verbose_name_plural = 'ингредиенты корзин'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_cart_ingredient'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient} ({self.user_id}): {self.amount}'
+
+
+class FeedItemQuerySet(models.query.QuerySet):
+    """
+    Helps by adding methods for keeping feeds of subscribers
+    filled with recent recipes of authors they follow.
+    """
+
+    def fan_out(self, recipe):
+        """
+        Puts a new recipe into feeds of all author's subscribers,
+        returns the number of feeds it was put into.
+        """
+        return len(self.bulk_create(
+            (
+                FeedItem(user_id=user_id, recipe=recipe,
+                         pub_date=recipe.pub_date)
+                for user_id in Subscription.objects.filter(
+                    subscription_id=recipe.author_id
+                ).values_list('user_id', flat=True).iterator()
+            ),
+            batch_size=SHOPPING_LIST_CHUNK_SIZE,
+            ignore_conflicts=True
+        ))
+
+    def backfill(self, user_id, author_id):
+        """Puts recent recipes of a followed author into user's feed."""
+        self.bulk_create(
+            (
+                FeedItem(user_id=user_id, recipe_id=recipe_id,
+                         pub_date=pub_date)
+                for recipe_id, pub_date in Recipe.objects.filter(
+                    author_id=author_id
+                ).order_by('-pub_date', '-id').values_list(
+                    'id', 'pub_date'
+                )[:FEED_LENGTH]
+            ),
+            ignore_conflicts=True
+        )
+        self.trim(user_id)
+
+    def trim(self, user_id):
+        """Keeps only FEED_LENGTH newest items of user's feed."""
+        items = self.filter(user_id=user_id)
+        last = items.order_by('-pub_date', '-recipe_id').values_list(
+            'pub_date', 'recipe_id'
+        )[FEED_LENGTH - 1:FEED_LENGTH].first()
+        if last is not None:
+            pub_date, recipe_id = last
+            items.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, recipe_id__lt=recipe_id)
+            ).delete()
+
+    def trim_subscribers(self, author_id):
+        """Trims feeds of all subscribers of the author."""
+        for user_id in Subscription.objects.filter(
+            subscription_id=author_id
+        ).values_list('user_id', flat=True).iterator():
+            self.trim(user_id)
+
+    def rebuild(self):
+        """Refills feeds of all users from their subscriptions."""
+        self.all().delete()
+        for user_id, author_id in Subscription.objects.values_list(
+            'user_id', 'subscription_id'
+        ).order_by('user_id').iterator():
+            self.backfill(user_id, author_id)
+
+
+class FeedItem(models.Model):
+    """
+    Recipe of a followed author in user's feed, written
+    when the recipe is published or the author is followed.
+    """
+
+    objects = FeedItemQuerySet.as_manager()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='пользователь',
+        related_name='feed_items'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='рецепт',
+        related_name='feed_items'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_item'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_item_user_pub_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} в ленте {self.user_id}'
+
+
+class DataVersionQuerySet(models.query.QuerySet):
+    """Helps by adding a method for bumping versions by their names."""
+
+    def bump(self, *names):
+        updated = self.filter(name__in=names).update(
+            version=models.F('version') + 1,
+            modified=timezone.now()
+        )
+        if updated < len(names):
+            self.bulk_create(
+                (DataVersion(name=name) for name in names),
+                ignore_conflicts=True
+            )
+
+
+class DataVersion(models.Model):
+    """
+    Modification counter for a set of data, e.g. a table
+    or everything that belongs to one user, used for
+    conditional requests.
+    """
+
+    objects = DataVersionQuerySet.as_manager()
+    name = models.CharField(
+        verbose_name='название',
+        max_length=MAX_LENGTH_SHORT,
+        primary_key=True,
+    )
+    version = models.PositiveBigIntegerField(
+        verbose_name='версия',
+        default=1,
+    )
+    modified = models.DateTimeField(
+        verbose_name='дата изменения',
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = 'версия данных'
+        verbose_name_plural = 'версии данных'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,151 @@
+import hashlib
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from time import monotonic
+
+from django.conf import settings
+
+from recipes.models import Ingredient, Tag
+
+
+def normalize(value):
+    """Brings a name to the form used for searching."""
+    return unicodedata.normalize('NFKC', value).casefold().strip()
+
+
+class LazyIndex(ABC):
+    """
+    Per-process in-memory data built lazily, dropped by
+    signals on changes and rebuilt after the number of
+    seconds in ttl_setting so that changes made in other
+    processes are picked up too.
+    """
+
+    ttl_setting = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._built_at = 0.0
+
+    def invalidate(self):
+        self._data = None
+
+    @abstractmethod
+    def _build(self):
+        """Reads the data from the database."""
+
+    def _get_data(self):
+        data = self._data
+        if (
+            data is None
+            or monotonic() - self._built_at
+            > getattr(settings, self.ttl_setting)
+        ):
+            with self._lock:
+                if self._data is data:
+                    self._data = self._build()
+                    self._built_at = monotonic()
+                data = self._data
+        return data
+
+
+class IngredientIndex(LazyIndex):
+    """
+    Index over ingredient names searched by the ingredient list:
+    first ingredients that start with searched phrase, then that
+    contain it, both alphabetically.
+    """
+
+    ttl_setting = 'INGREDIENT_INDEX_TTL'
+
+    def _build(self):
+        entries = list(
+            Ingredient.objects.order_by('name', 'id').values(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        names = [normalize(entry['name']) for entry in entries]
+        prefixes = sorted(zip(names, range(len(names))))
+        starts = []
+        offset = 0
+        for name in names:
+            starts.append(offset)
+            offset += len(name) + 1
+        digest = hashlib.sha1(repr(entries).encode()).hexdigest()
+        return {
+            'digest': digest,
+            'entries': entries,
+            'prefix_keys': [key for key, _ in prefixes],
+            'prefix_positions': [position for _, position in prefixes],
+            'text': '\n'.join(names),
+            'starts': starts,
+        }
+
+    def digest(self):
+        """Hash of indexed ingredients, changes with their content."""
+        return self._get_data()['digest']
+
+    def search(self, value=''):
+        data = self._get_data()
+        value = normalize(value)
+        if not value:
+            return data['entries']
+        if '\n' in value:
+            return []
+        keys = data['prefix_keys']
+        first = bisect_left(keys, value)
+        last = bisect_right(keys, value + '\U0010ffff', first)
+        starting = set(data['prefix_positions'][first:last])
+        containing = set()
+        text, starts = data['text'], data['starts']
+        found = text.find(value)
+        while found != -1:
+            position = bisect_right(starts, found) - 1
+            if position not in starting:
+                containing.add(position)
+            found = text.find(value, starts[position + 1]) if (
+                position + 1 < len(starts)
+            ) else -1
+        return [
+            data['entries'][position]
+            for group in (starting, containing)
+            for position in sorted(group)
+        ]
+
+
+class TagIndex(LazyIndex):
+    """
+    Mapping of tag slugs to ids for filtering recipes. A slug
+    missing from the index rebuilds it once, so tags created in
+    other processes or imported without signals are found
+    before the index expires.
+    """
+
+    ttl_setting = 'TAG_INDEX_TTL'
+
+    def _build(self):
+        return dict(Tag.objects.values_list('slug', 'id'))
+
+    def _get_slugs(self, slugs):
+        data = self._get_data()
+        if any(slug not in data for slug in slugs):
+            self.invalidate()
+            data = self._get_data()
+        return data
+
+    def choices(self):
+        return [(slug, slug) for slug in sorted(self._get_data())]
+
+    def exists(self, slug):
+        return slug in self._get_slugs([slug])
+
+    def ids(self, slugs):
+        data = self._get_slugs(slugs)
+        return [data[slug] for slug in slugs if slug in data]
+
+
+ingredient_index = IngredientIndex()
+tag_index = TagIndex()
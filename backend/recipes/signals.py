@@ -0,0 +1,262 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, QuerySet, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from recipes.constants import (
+    FAVORITES_VERSION,
+    RECIPES_VERSION,
+    TAGS_VERSION,
+    USER_VERSION
+)
+from recipes.models import (
+    DataVersion,
+    Favorite,
+    FeedItem,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartIngredient,
+    Tag
+)
+from recipes.search import ingredient_index, tag_index
+from recipes.tasks import trim_feeds
+from taskqueue.registry import enqueue
+from users.models import Subscription
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tag_index(**kwargs):
+    tag_index.invalidate()
+
+
+def update_search_vector_on_commit(recipes):
+    """
+    Waits for the transaction to finish, so that ingredients
+    created after the recipe itself get into its vector.
+    """
+    transaction.on_commit(recipes.update_search_vector)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(instance, **kwargs):
+    update_search_vector_on_commit(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def update_recipe_ingredients_search_vector(instance, **kwargs):
+    update_search_vector_on_commit(
+        Recipe.objects.filter(pk=instance.recipe_id)
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search_vector(instance, created, **kwargs):
+    if not created:
+        update_search_vector_on_commit(
+            Recipe.objects.filter(ingredients=instance)
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def subtract_recipe_from_shopping_carts(instance, **kwargs):
+    """Carts lose the recipe by cascade, totals lose its ingredients."""
+    ShoppingCartIngredient.objects.add_recipe(
+        ShoppingCart.objects.filter(recipe=instance).values_list(
+            'user_id', flat=True
+        ),
+        instance.pk,
+        sign=-1
+    )
+
+
+def move_shopping_cart_totals(item, sign=1):
+    """
+    Adds (or subtracts with sign=-1) a cart item or an ingredient
+    of a recipe to totals of carts it belongs to.
+    """
+    if isinstance(item, ShoppingCart):
+        ShoppingCartIngredient.objects.add_recipe(
+            (item.user_id,), item.recipe_id, sign
+        )
+    else:
+        ShoppingCartIngredient.objects.add_amounts(
+            ShoppingCart.objects.filter(recipe_id=item.recipe_id).values_list(
+                'user_id', flat=True
+            ),
+            {item.ingredient_id: sign * item.amount}
+        )
+
+
+def shopping_cart_key(item):
+    if isinstance(item, ShoppingCart):
+        return item.user_id, item.recipe_id
+    return item.recipe_id, item.ingredient_id, item.amount
+
+
+@receiver(pre_save, sender=ShoppingCart)
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_shopping_cart_item(sender, instance, **kwargs):
+    """A changed row leaves cart totals with its stored values."""
+    if not instance._state.adding:
+        instance._stored_item = sender.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=RecipeIngredient)
+def add_to_shopping_cart_totals(instance, **kwargs):
+    """
+    Keeps totals right for every single-row write, the admin
+    included. Bulk writes skip signals and move totals themselves.
+    """
+    stored = instance.__dict__.pop('_stored_item', None)
+    if stored is not None:
+        if shopping_cart_key(stored) == shopping_cart_key(instance):
+            return
+        move_shopping_cart_totals(stored, sign=-1)
+    move_shopping_cart_totals(instance)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=RecipeIngredient)
+def subtract_from_shopping_cart_totals(sender, instance, origin, **kwargs):
+    """
+    Cascades are left out: recipes subtract themselves before
+    deletion, totals of deleted users and ingredients cascade.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if model is sender:
+        move_shopping_cart_totals(instance, sign=-1)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def bump_recipes_version(**kwargs):
+    DataVersion.objects.bump(RECIPES_VERSION)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipe_tags_version(action, **kwargs):
+    if action.startswith('post_'):
+        DataVersion.objects.bump(RECIPES_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(**kwargs):
+    DataVersion.objects.bump(TAGS_VERSION, RECIPES_VERSION)
+
+
+@receiver(post_save, sender=Ingredient)
+def bump_ingredient_recipes_version(created, **kwargs):
+    if not created:
+        DataVersion.objects.bump(RECIPES_VERSION)
+
+
+@receiver(post_save, sender=User)
+def bump_author_version(update_fields, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login', 'password'}:
+        return
+    DataVersion.objects.bump(RECIPES_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscription)
+def bump_user_version(sender, instance, **kwargs):
+    """
+    favorites_count is a part of every recipe representation,
+    its own version keeps the rest of recipes versions intact.
+    """
+    names = [USER_VERSION.format(instance.user_id)]
+    if sender is Favorite:
+        names.append(FAVORITES_VERSION)
+    DataVersion.objects.bump(*names)
+
+
+def move_counter(queryset, field, delta):
+    """Atomically moves a counter column, never below zero."""
+    queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+@receiver(post_save, sender=Favorite)
+def count_favorite(instance, created, **kwargs):
+    if created:
+        move_counter(
+            Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def uncount_favorite(instance, **kwargs):
+    move_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe(instance, created, **kwargs):
+    if created:
+        move_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def uncount_recipe(instance, **kwargs):
+    move_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Subscription)
+def count_subscriber(instance, created, **kwargs):
+    if created:
+        move_counter(
+            User.objects.filter(pk=instance.subscription_id),
+            'subscribers_count', 1
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def uncount_subscriber(instance, **kwargs):
+    move_counter(
+        User.objects.filter(pk=instance.subscription_id),
+        'subscribers_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(instance, created, **kwargs):
+    """Trimming reads whole feeds, so it is left to a worker."""
+    if created and FeedItem.objects.fan_out(instance):
+        enqueue(trim_feeds, author_id=instance.author_id)
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_feed(instance, created, **kwargs):
+    if created:
+        FeedItem.objects.backfill(instance.user_id, instance.subscription_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def clear_feed(instance, **kwargs):
+    FeedItem.objects.filter(
+        user_id=instance.user_id,
+        recipe__author_id=instance.subscription_id
+    ).delete()
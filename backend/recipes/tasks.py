@@ -0,0 +1,11 @@
+from recipes.models import FeedItem
+from taskqueue.registry import task
+
+
+@task
+def trim_feeds(author_id):
+    """
+    Keeps feeds of author's subscribers at FEED_LENGTH items
+    after a new recipe is fanned out to them.
+    """
+    FeedItem.objects.trim_subscribers(author_id)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from recipes.constants import EMPTY_VALUE_RU
+from taskqueue.models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'name', 'user', 'status', 'attempts', 'created', 'finished'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+    readonly_fields = ('created', 'started', 'finished')
+    empty_value_display = EMPTY_VALUE_RU
+
+
+admin.site.register(Task, TaskAdmin)
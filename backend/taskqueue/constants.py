@@ -0,0 +1,12 @@
+MAX_LENGTH_TASK_NAME = 200
+TASK_PENDING = 'pending'
+TASK_RUNNING = 'running'
+TASK_DONE = 'done'
+TASK_FAILED = 'failed'
+TASK_STATUSES = (
+    (TASK_PENDING, 'в очереди'),
+    (TASK_RUNNING, 'выполняется'),
+    (TASK_DONE, 'выполнена'),
+    (TASK_FAILED, 'ошибка'),
+)
+TASK_MAINTENANCE_INTERVAL = 60
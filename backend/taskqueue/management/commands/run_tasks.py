@@ -0,0 +1,58 @@
+import signal
+from time import monotonic, sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from taskqueue.constants import TASK_MAINTENANCE_INTERVAL
+from taskqueue.models import Task
+from taskqueue.registry import fail, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs queued tasks one by one until stopped. Once a minute '
+        'returns tasks of dead workers to the queue, failing ones out '
+        'of attempts, and deletes old finished ones. SIGTERM lets the '
+        'current task finish.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the queue is empty.'
+        )
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        processed = 0
+        maintained = None
+        while not self.stopping:
+            close_old_connections()
+            if (
+                maintained is None
+                or monotonic() - maintained > TASK_MAINTENANCE_INTERVAL
+            ):
+                for failed in Task.objects.requeue_stale():
+                    fail(failed)
+                Task.objects.purge()
+                maintained = monotonic()
+            queued = Task.objects.claim()
+            if queued is None:
+                if options['once']:
+                    break
+                sleep(settings.TASK_POLL_INTERVAL)
+                continue
+            queued = run(queued)
+            processed += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(str(queued))
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {processed}.'
+        ))
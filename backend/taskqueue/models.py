@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.utils import timezone
+
+from taskqueue.constants import (
+    MAX_LENGTH_TASK_NAME,
+    TASK_DONE,
+    TASK_FAILED,
+    TASK_PENDING,
+    TASK_RUNNING,
+    TASK_STATUSES
+)
+
+
+class TaskQuerySet(models.query.QuerySet):
+    """Methods used by workers to take and clean up tasks."""
+
+    def claim(self):
+        """
+        Marks the oldest due task as running and returns it,
+        None when there is nothing to do. The conditional
+        update keeps a task from being taken twice even where
+        SELECT ... FOR UPDATE SKIP LOCKED is not supported.
+        """
+        now = timezone.now()
+        due = self.filter(
+            status=TASK_PENDING, run_after__lte=now
+        ).order_by('run_after', 'id')
+        with transaction.atomic():
+            task = due.select_for_update(skip_locked=True).first()
+            if task is None:
+                return None
+            claimed = self.filter(pk=task.pk, status=TASK_PENDING).update(
+                status=TASK_RUNNING,
+                started=now,
+                attempts=models.F('attempts') + 1
+            )
+        if not claimed:
+            return None
+        task.status, task.started = TASK_RUNNING, now
+        task.attempts += 1
+        return task
+
+    def requeue_stale(self):
+        """
+        Returns tasks of workers that died midway to the queue,
+        ones that have used up their attempts are failed instead.
+        Returns the failed tasks, their failure hooks are left
+        to the caller.
+        """
+        now = timezone.now()
+        stale = self.filter(
+            status=TASK_RUNNING,
+            started__lt=now - timedelta(seconds=settings.TASK_TIMEOUT)
+        )
+        stale.filter(attempts__lt=settings.TASK_MAX_ATTEMPTS).update(
+            status=TASK_PENDING
+        )
+        with transaction.atomic():
+            failed = list(stale.filter(
+                attempts__gte=settings.TASK_MAX_ATTEMPTS
+            ).select_for_update(skip_locked=True))
+            for task in failed:
+                task.status, task.finished = TASK_FAILED, now
+                task.error = 'Задача не завершилась за отведённое время.'
+            self.bulk_update(failed, ('status', 'finished', 'error'))
+        return failed
+
+    def purge(self):
+        """Deletes old finished tasks together with their files."""
+        old = self.filter(
+            status__in=(TASK_DONE, TASK_FAILED),
+            finished__lt=timezone.now() - timedelta(
+                seconds=settings.TASK_RETENTION
+            )
+        )
+        for result in old.exclude(result=None).values_list(
+            'result', flat=True
+        ):
+            if isinstance(result, dict) and result.get('file'):
+                default_storage.delete(result['file'])
+        return old.delete()[0]
+
+
+class Task(models.Model):
+    """A call of a registered function made by a worker."""
+
+    objects = TaskQuerySet.as_manager()
+    name = models.CharField(
+        verbose_name='функция',
+        max_length=MAX_LENGTH_TASK_NAME,
+    )
+    payload = models.JSONField(
+        verbose_name='аргументы',
+        default=dict,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tasks',
+    )
+    status = models.CharField(
+        verbose_name='статус',
+        max_length=max(len(status) for status, _ in TASK_STATUSES),
+        choices=TASK_STATUSES,
+        default=TASK_PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='попыток',
+        default=0,
+    )
+    result = models.JSONField(
+        verbose_name='результат',
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        verbose_name='ошибка',
+        blank=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='создана',
+        auto_now_add=True,
+    )
+    run_after = models.DateTimeField(
+        verbose_name='выполнить после',
+        default=timezone.now,
+    )
+    started = models.DateTimeField(
+        verbose_name='начата',
+        null=True,
+        blank=True,
+    )
+    finished = models.DateTimeField(
+        verbose_name='завершена',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'задача'
+        verbose_name_plural = 'задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after', 'id'],
+                name='task_status_run_after_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}: {self.status}'
@@ -0,0 +1,96 @@
+import logging
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from taskqueue.constants import TASK_DONE, TASK_FAILED, TASK_PENDING
+from taskqueue.models import Task
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+class TaskFailed(Exception):
+    """Failure that retrying will not fix, e.g. invalid input."""
+
+
+def task(func=None, *, on_failure=None):
+    """
+    Registers a function, so that it can be enqueued. on_failure
+    is called with the same arguments once the task has failed
+    for good, e.g. to show the failure on the processed object.
+    """
+    if func is None:
+        return partial(task, on_failure=on_failure)
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    func.on_failure = on_failure
+    TASKS[func.task_name] = func
+    return func
+
+
+def fail(queued):
+    """Calls the failure hook of a task that will not be retried."""
+    func = TASKS.get(queued.name)
+    if func is None or func.on_failure is None:
+        return
+    try:
+        func.on_failure(**queued.payload)
+    except Exception:
+        logger.exception(
+            'Обработчик ошибки задачи %s #%s упал', queued.name, queued.pk
+        )
+
+
+def enqueue(func, user=None, **payload):
+    """
+    Saves a call of a registered function for a worker, user is
+    the one allowed to see the task status. The row becomes
+    visible to workers when the surrounding transaction commits.
+    With TASKS_EAGER the call is run right after commit in this
+    process instead, e.g. for development without a worker.
+    """
+    queued = Task.objects.create(
+        name=func.task_name, payload=payload, user=user
+    )
+    if settings.TASKS_EAGER:
+        queued.attempts = 1
+        transaction.on_commit(partial(run, queued))
+    return queued
+
+
+def run(queued):
+    """Calls the function of a taken task and saves the outcome."""
+    now = timezone.now()
+    try:
+        func = TASKS[queued.name]
+        queued.result = func(**queued.payload)
+    except TaskFailed as error:
+        queued.status, queued.finished = TASK_FAILED, now
+        queued.error = str(error)
+    except Exception:
+        queued.error = traceback.format_exc()
+        logger.exception('Задача %s #%s упала', queued.name, queued.pk)
+        if (
+            queued.name in TASKS
+            and queued.attempts < settings.TASK_MAX_ATTEMPTS
+        ):
+            queued.status = TASK_PENDING
+            queued.run_after = now + timedelta(
+                seconds=settings.TASK_RETRY_DELAY * 2 ** (queued.attempts - 1)
+            )
+        else:
+            queued.status, queued.finished = TASK_FAILED, now
+    else:
+        queued.status, queued.finished = TASK_DONE, now
+        queued.error = ''
+    queued.save(update_fields=(
+        'status', 'result', 'error', 'attempts', 'run_after', 'finished'
+    ))
+    if queued.status == TASK_FAILED:
+        fail(queued)
+    return queued
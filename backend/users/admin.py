@@ -17,6 +17,8 @@ class FoodgramUserAdmin(UserAdmin):
         'username',
         'is_staff',
         'is_active',
+        'recipes_count',
+        'subscribers_count',
     )
     list_editable = (
         'is_staff',
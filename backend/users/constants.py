@@ -1,2 +1,12 @@
 MAX_LENGTH_EMAIL = 256
 MAX_LENGTH_NAME = 150
+AVATAR_THUMBNAIL_SIZES = (96,)
+IMAGE_READY = 'ready'
+IMAGE_PENDING = 'pending'
+IMAGE_FAILED = 'failed'
+IMAGE_STATUSES = (
+    (IMAGE_READY, 'обработано'),
+    (IMAGE_PENDING, 'обрабатывается'),
+    (IMAGE_FAILED, 'ошибка обработки'),
+)
+MAX_LENGTH_IMAGE_STATUS = 16
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-17 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscription', 'user'], name='subscription_reverse_idx'),
+        ),
+    ]
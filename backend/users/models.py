@@ -1,16 +1,75 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models import BooleanField, Exists, OuterRef, Value
 
-from users.constants import MAX_LENGTH_EMAIL, MAX_LENGTH_NAME
+from users.constants import (
+    IMAGE_READY,
+    IMAGE_STATUSES,
+    MAX_LENGTH_EMAIL,
+    MAX_LENGTH_IMAGE_STATUS,
+    MAX_LENGTH_NAME
+)
 
 
-class User(AbstractUser):
+class UserQuerySet(models.query.QuerySet):
+    """
+    Helps by adding a method for fetching users with
+    annotated is_subscribed field, expects user
+    (the one who is looking) as an argument.
+    """
+
+    def with_is_subscribed(self, user):
+        if user.is_authenticated:
+            return self.annotate(
+                is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        user=user,
+                        subscription=OuterRef('pk')
+                    )
+                )
+            )
+        return self.annotate(
+            is_subscribed=Value(False, output_field=BooleanField())
+        )
+
+
+class FoodgramUserManager(UserManager.from_queryset(UserQuerySet)):
+    """Default user manager with UserQuerySet methods."""
+
+
+class CountersMixin:
+    """
+    Keeps counter columns out of saves of loaded instances: they
+    are moved only by atomic updates in signals, so values read
+    before a concurrent change are never written back.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding and not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(CountersMixin, AbstractUser):
     """
     Custom User model for Foodgram project.
     All fields except avatar are required,
     username field is email.
     """
 
+    objects = FoodgramUserManager()
     email = models.EmailField(max_length=MAX_LENGTH_EMAIL, unique=True)
     first_name = models.CharField(
         max_length=MAX_LENGTH_NAME,
@@ -24,6 +83,24 @@ class User(AbstractUser):
         default=None,
         upload_to='users/avatars'
     )
+    avatar_status = models.CharField(
+        verbose_name='статус аватара',
+        max_length=MAX_LENGTH_IMAGE_STATUS,
+        choices=IMAGE_STATUSES,
+        default=IMAGE_READY,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='подписчиков',
+        default=0,
+        editable=False,
+    )
+    counter_fields = ('recipes_count', 'subscribers_count')
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
 
@@ -52,3 +129,9 @@ class Subscription(models.Model):
                 name="prevent_self_subscription",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['subscription', 'user'],
+                name='subscription_reverse_idx'
+            ),
+        ]